@@ -0,0 +1,156 @@
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
+import atexit
+import queue
+import threading
+import time
+
+PISA_URL = 'https://www.ebi.ac.uk/pdbe/pisa/'
+# requests the scraper never needs: images, stylesheets, fonts and third-party trackers
+BLOCKED_URLS = ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg', '*.ico',
+                '*.css', '*.woff', '*.woff2', '*.ttf', '*.otf',
+                '*google-analytics.com*', '*googletagmanager.com*',
+                '*doubleclick.net*', '*facebook.net*', '*twitter.com*']
+
+
+# starts chrome; headless mode also runs a lean browser that skips everything but the html and pisa's own scripts
+def start_chrome(chrome_driver_path, headless=False):
+    if not headless:
+        return (webdriver.Chrome(chrome_driver_path))
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--window-size=1280,1024')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.managed_default_content_settings.stylesheets': 2,
+        'profile.managed_default_content_settings.fonts': 2})
+    # return from page loads once the DOM is parsed instead of waiting for every resource
+    capabilities = DesiredCapabilities.CHROME.copy()
+    capabilities['pageLoadStrategy'] = 'eager'
+    driver = webdriver.Chrome(chrome_driver_path, options=options,
+                              desired_capabilities=capabilities)
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URLS})
+    # eager loads can hand control back before late elements exist, so poll for them briefly
+    driver.implicitly_wait(10)
+    return (driver)
+
+
+class PISA_Driver_Pool:
+    def __init__(self, chrome_driver_path, size=2, url=PISA_URL, headless=False):
+        self.chrome_driver_path = chrome_driver_path
+        self.headless = headless
+        self.size = size
+        self.url = url
+        self.drivers = []
+        # slots reserved for sessions being started outside the lock
+        self.starting = 0
+        self.idle_drivers = queue.Queue()
+        self.lock = threading.Lock()
+        self.closed = False
+        # quit any session still alive when the interpreter exits
+        atexit.register(self.close)
+
+    def new_driver(self):
+        driver = start_chrome(self.chrome_driver_path, self.headless)
+        driver.get(self.url)
+        return (driver)
+
+    # claims a slot for a new session while the pool is below size; the session itself is started outside the
+    # lock, so other acquires and releases don't wait behind a browser startup
+    def reserve(self):
+        with self.lock:
+            if len(self.drivers) + self.starting < self.size:
+                self.starting += 1
+                return (True)
+        return (False)
+
+    # starts a session in a reserved slot
+    def start_reserved(self):
+        try:
+            driver = self.new_driver()
+        except BaseException:
+            with self.lock:
+                self.starting -= 1
+            raise
+        with self.lock:
+            self.starting -= 1
+            if not self.closed:
+                self.drivers.append(driver)
+                return (driver)
+        driver.quit()
+        raise RuntimeError('PISA_Driver_Pool is closed')
+
+    # starts every session up front so the first submissions don't pay browser startup
+    def warm_up(self):
+        while self.reserve():
+            self.idle_drivers.put(self.start_reserved())
+
+    # hands out an idle session, starting a new one while the pool is below size
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.closed:
+                raise RuntimeError('PISA_Driver_Pool is closed')
+            try:
+                return (self.idle_drivers.get_nowait())
+            except queue.Empty:
+                pass
+            if self.reserve():
+                return (self.start_reserved())
+            # wake up periodically in case a discarded session freed a slot
+            wait = 1 if deadline is None else min(1, deadline - time.monotonic())
+            if wait <= 0:
+                raise queue.Empty
+            try:
+                return (self.idle_drivers.get(timeout=wait))
+            except queue.Empty:
+                pass
+
+    # resets a session to the pisa landing page and returns it to the pool
+    def release(self, driver):
+        if self.closed:
+            self.discard(driver)
+            return
+        try:
+            driver.delete_all_cookies()
+            driver.get(self.url)
+        except WebDriverException:
+            # crashed or hung sessions are replaced on the next acquire
+            self.discard(driver)
+            return
+        self.idle_drivers.put(driver)
+
+    def discard(self, driver):
+        with self.lock:
+            # a session handed back after close was already quit with the others
+            if driver not in self.drivers:
+                return
+            self.drivers.remove(driver)
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def close(self):
+        self.closed = True
+        with self.lock:
+            drivers = self.drivers
+            self.drivers = []
+        for driver in drivers:
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+        self.idle_drivers = queue.Queue()
+
+    def __enter__(self):
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import numpy as np
+import os
+import threading
+import time
+
+
+# hashes the structure file bytes so renamed or moved copies share cache entries
+def hash_file(file_path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# key of the results a pisa service gave for a structure file: the file hash and a hash of the service address, so
+# pages of a stand-in or replaying server never answer for the real service or the other way round
+def result_key(file_hash, service_url):
+    return file_hash + '_' + hashlib.sha256(service_url.encode('utf-8')).hexdigest()[:16]
+
+
+class PISA_Cache:
+    # bump when the layout of the stored results changes
+    VERSION = 2
+    SUFFIX = '.json'
+    # an eviction frees the cache down to this share of its limits, so the next one is many puts away
+    EVICT_TO = 0.9
+
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024, max_age=30 * 24 * 60 * 60, max_entries=None):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.path.expanduser('~'), '.louisenet', 'pisa_cache')
+        self.cache_dir = os.path.join(cache_dir, 'v' + str(self.VERSION))
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        # size of every entry by path, read from the folder on the first put and kept up to date by each put
+        # and remove, so a put only lists the folder again when it takes the cache over a limit
+        self.entry_sizes = None
+        self.total_bytes = 0
+        self.lock = threading.RLock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def entry_path(self, file_hash, result_type):
+        return os.path.join(self.cache_dir, file_hash + '_' + result_type + self.SUFFIX)
+
+    # returns the stored result or None; expired entries count as misses
+    def get(self, file_hash, result_type):
+        value = self.peek(file_hash, result_type)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    # looks an entry up without counting a hit or a miss, for callers that only plan the work
+    def peek(self, file_hash, result_type):
+        path = self.entry_path(file_hash, result_type)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                self.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, file_hash, result_type, value):
+        path = self.entry_path(file_hash, result_type)
+        # write to a temporary file first so an interrupted run never leaves half an entry
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(temp_path, path)
+        self.added(path)
+
+    # counts a written entry in the running totals and evicts once they pass max_bytes or max_entries
+    def added(self, path):
+        with self.lock:
+            if self.entry_sizes is None:
+                self.evict()
+            size = os.path.getsize(path)
+            self.total_bytes += size - self.entry_sizes.get(path, 0)
+            self.entry_sizes[path] = size
+            if self.over_limit(self.total_bytes, len(self.entry_sizes)):
+                self.evict()
+
+    def over_limit(self, total_bytes, entry_count, share=1.0):
+        if total_bytes > self.max_bytes * share:
+            return (True)
+        return (self.max_entries is not None and entry_count > self.max_entries * share)
+
+    # drops expired entries, then, when the cache is over a limit, the oldest ones until it is EVICT_TO of the way
+    # there; also rereads the running totals, which catches entries other runs added to the folder
+    def evict(self):
+        with self.lock:
+            now = time.time()
+            entries = []
+            for filename in os.listdir(self.cache_dir):
+                if not filename.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if now - stat.st_mtime > self.max_age and self.remove(path):
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            self.entry_sizes = {path: size for mtime, size, path in entries}
+            self.total_bytes = sum(self.entry_sizes.values())
+            if self.over_limit(self.total_bytes, len(self.entry_sizes)):
+                for mtime, size, path in sorted(entries):
+                    if not self.over_limit(self.total_bytes, len(self.entry_sizes), self.EVICT_TO):
+                        break
+                    self.remove(path)
+
+    # entries still memory mapped by a run can't be deleted on windows; they go on a later eviction
+    def remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            return False
+        with self.lock:
+            if self.entry_sizes is not None and path in self.entry_sizes:
+                self.total_bytes -= self.entry_sizes.pop(path)
+        return True
+
+    def clear(self):
+        for filename in os.listdir(self.cache_dir):
+            self.remove(os.path.join(self.cache_dir, filename))
+
+    def stats(self):
+        sizes = [os.path.getsize(os.path.join(self.cache_dir, filename))
+                 for filename in os.listdir(self.cache_dir) if filename.endswith(self.SUFFIX)]
+        return {'hits': self.hits, 'misses': self.misses,
+                'entries': len(sizes), 'bytes': sum(sizes)}
+
+
+class Structure_Cache(PISA_Cache):
+    # parsed structures stored as .npy files and memory mapped when loaded, so repeat runs on the same
+    # structure file skip the text parsing and only read the pages of the atom array they use
+    VERSION = 1
+    SUFFIX = '.npy'
+
+    def __init__(self, cache_dir=None, max_bytes=4 * 1024 * 1024 * 1024, max_age=30 * 24 * 60 * 60):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.path.expanduser('~'), '.louisenet', 'structure_cache')
+        super().__init__(cache_dir, max_bytes, max_age)
+
+    def get(self, file_hash, result_type='atoms'):
+        return super().get(file_hash, result_type)
+
+    def peek(self, file_hash, result_type='atoms'):
+        path = self.entry_path(file_hash, result_type)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                self.remove(path)
+                raise FileNotFoundError(path)
+            value = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+        return value
+
+    def put(self, file_hash, result_type, value):
+        path = self.entry_path(file_hash, result_type)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            np.save(f, value)
+        os.replace(temp_path, path)
+        self.added(path)
+
+
+class Interface_Cache(PISA_Cache):
+    # per chain surfaces and per chain pair interfaces of the local interface computation, keyed by the
+    # fingerprints of the chains' atoms, so a rebuild after editing some chains only recomputes those
+    VERSION = 1
+
+    # entries are mostly under a hundred bytes, so max_bytes alone would let millions of them pile up in the folder
+    def __init__(self, cache_dir=None, max_bytes=512 * 1024 * 1024, max_age=30 * 24 * 60 * 60, max_entries=100000):
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                os.path.expanduser('~'), '.louisenet', 'interface_cache')
+        super().__init__(cache_dir, max_bytes, max_age, max_entries)
+
+
+class PISA_Checkpoint:
+    # one json line per fetched interface after a header line naming the structure file hash
+    def __init__(self, file_path, file_hash, resume=False):
+        self.file_path = file_path
+        self.file_hash = file_hash
+        self.details = {}
+        if resume:
+            self.load()
+        # rewrite the file so a line torn by a crash never sits before new entries
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'structure_hash': self.file_hash}) + '\n')
+            for interface_id, details in self.details.items():
+                f.write(json.dumps({'interface_id': interface_id, 'details': details}) + '\n')
+        self.file = open(self.file_path, 'a', encoding='utf-8')
+
+    # reads the entries of a previous run on the same structure file
+    def load(self):
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        try:
+            if len(lines) == 0 or json.loads(lines[0]).get('structure_hash') != self.file_hash:
+                return
+        except ValueError:
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            self.details[entry['interface_id']] = entry['details']
+
+    # persists one interface as soon as it has been fetched
+    def add(self, interface_id, details):
+        self.details[interface_id] = details
+        self.file.write(json.dumps({'interface_id': interface_id, 'details': details}) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+    # deletes the checkpoint once the run no longer needs it
+    def remove(self):
+        self.close()
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
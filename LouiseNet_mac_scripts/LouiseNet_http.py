@@ -0,0 +1,132 @@
+from lxml import html
+from requests.adapters import HTTPAdapter
+import os
+import requests
+import threading
+import time
+from LouiseNet_browser import PISA_URL
+
+INTERFACES_BUTTON_XPATH = '//button[contains(text(), "Interfaces")]'
+
+
+class PISA_Rate_Limiter:
+    # spaces out requests to the pisa service; shared by every client and thread of a run
+    def __init__(self, requests_per_second=2.0):
+        self.interval = 1.0 / requests_per_second
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    # reserves the next free slot and sleeps until it comes up
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_time, now)
+            self.next_time = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class PISA_HTTP_Client:
+    # page source that talks to pisa over plain http: the same forms the browser submits, without rendering or scripts
+    offline = False
+
+    def __init__(self, pdb_file_path, pisa_url=PISA_URL, timeout=300, poll_interval=5, pool_size=4, rate_limiter=None):
+        self.pdb_file_path = pdb_file_path
+        self.pisa_url = pisa_url
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # one keep-alive session shared by every request of the job, with room for concurrent detail requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # optional PISA_Rate_Limiter every request waits on
+        self.rate_limiter = rate_limiter
+        self.interfaces_response = None
+        self.lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        if self.rate_limiter is not None:
+            self.rate_limiter.wait()
+        return (self.session.request(method, url, timeout=self.timeout, **kwargs))
+
+    # submits the form holding the given element, with extra fields, files and the clicked button
+    def submit_form(self, response, element_xpath, fields=None, files=None, button=None):
+        page = html.fromstring(response.text, base_url=response.url)
+        element = page.xpath(element_xpath)[0]
+        form = next(element.iterancestors('form'))
+        data = dict(form.form_values())
+        data.update(fields or {})
+        if button is not None and button.get('name'):
+            data[button.get('name')] = button.get('value', '')
+        url = form.action or response.url
+        if form.method.upper() == 'POST':
+            return (self.request('POST', url, data=data, files=files))
+        return (self.request('GET', url, params=data))
+
+    # uploads the structure file and submits the job; pisa may answer with a progress page
+    def start_job(self):
+        landing = self.request('GET', self.pisa_url)
+        launch_xpath = '//*[@id="pdbeSubmitButton"]//button'
+        launch = self.submit_form(landing, launch_xpath,
+                                  button=html.fromstring(landing.text).xpath(launch_xpath)[0])
+        launch_page = html.fromstring(launch.text)
+        file_input = launch_page.xpath('//input[@type="file"]')[0]
+        coordinate_file_button = launch_page.xpath('//input[@type="radio" and @value="id_coorfile"]')[0]
+        upload_button = launch_page.xpath('//*[@id="sform"]//input[@type="submit"]')[0]
+        with open(self.pdb_file_path, 'rb') as f:
+            uploaded = self.submit_form(
+                launch, '//input[@type="file"]',
+                fields={coordinate_file_button.get('name'): 'id_coorfile'},
+                files={file_input.get('name'): (os.path.basename(self.pdb_file_path), f)},
+                button=upload_button)
+        submit_button = html.fromstring(uploaded.text).xpath(launch_xpath)[0]
+        return (self.submit_form(uploaded, launch_xpath,
+                                 fields={coordinate_file_button.get('name'): 'id_coorfile'},
+                                 files={file_input.get('name'): ('', b'')},
+                                 button=submit_button))
+
+    # pisa keeps answering with a progress page until the job is done
+    def job_done(self, response):
+        return (len(html.fromstring(response.text).xpath(INTERFACES_BUTTON_XPATH)) != 0)
+
+    def poll_job(self, response):
+        return (self.request('GET', response.url))
+
+    # uploads the structure file and waits for the interfaces page of the job
+    def submit_structure(self):
+        response = self.start_job()
+        deadline = time.monotonic() + self.timeout
+        while not self.job_done(response):
+            if time.monotonic() > deadline:
+                raise TimeoutError('PISA did not finish ' + self.pdb_file_path)
+            time.sleep(self.poll_interval)
+            response = self.poll_job(response)
+        self.interfaces_response = response
+        return (response)
+
+    def interfaces_page(self):
+        with self.lock:
+            if self.interfaces_response is None:
+                self.submit_structure()
+        return (self.interfaces_response.text)
+
+    # details page of one interface; safe to call from several threads once the job is submitted
+    def details_page(self, interface_id):
+        self.interfaces_page()
+        page = html.fromstring(self.interfaces_response.text)
+        details_button = page.xpath('//button[contains(text(), "Details")]')[0]
+        response = self.submit_form(self.interfaces_response,
+                                    "//input[@name='radio_interface']",
+                                    fields={'radio_interface': str(interface_id)},
+                                    button=details_button)
+        return (response.text)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
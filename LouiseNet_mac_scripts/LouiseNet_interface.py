@@ -0,0 +1,864 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import hashlib
+import numpy as np
+import os
+import pandas as pd
+
+PROBE_RADIUS = 1.4
+# bondi van der waals radii; elements not listed get DEFAULT_RADIUS
+VDW_RADII = {b'C': 1.7, b'N': 1.55, b'O': 1.52, b'S': 1.8, b'P': 1.8, b'SE': 1.9, b'F': 1.47,
+             b'CL': 1.75, b'BR': 1.85, b'I': 1.98, b'MG': 1.73, b'NA': 2.27, b'K': 2.75,
+             b'ZN': 1.39, b'FE': 1.4, b'CA': 1.97, b'MN': 1.4, b'CU': 1.4}
+DEFAULT_RADIUS = 1.8
+HYDROGENS = (b'H', b'D')
+# the cell itself, then the 13 neighbouring cells that with it cover every pair of atoms once, then the other 13
+CELL_OFFSETS = np.array([(0, 0, 0)]
+                        + [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                           if (dx, dy, dz) > (0, 0, 0)]
+                        + [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                           if (dx, dy, dz) < (0, 0, 0)])
+BIT_COUNTS = np.array([bin(k).count('1') for k in range(256)], dtype=np.uint16)
+# what a Cell_List is made of, to hand it to other processes
+CELL_LIST_ARRAYS = ('coordinates', 'order', 'positions', 'sorted_keys', 'sorted_cells', 'sorted_coordinates',
+                    'occupied', 'cell_begin', 'cell_end')
+# polar side chain atoms by residue and atom name; backbone N is a donor (but in proline) and O, OXT acceptors
+DONORS = [b'ARG NE', b'ARG NH1', b'ARG NH2', b'ASN ND2', b'GLN NE2', b'HIS ND1', b'HIS NE2', b'LYS NZ',
+          b'SER OG', b'THR OG1', b'TYR OH', b'TRP NE1', b'CYS SG']
+ACCEPTORS = [b'ASP OD1', b'ASP OD2', b'GLU OE1', b'GLU OE2', b'ASN OD1', b'GLN OE1', b'HIS ND1', b'HIS NE2',
+             b'SER OG', b'THR OG1', b'TYR OH', b'MET SD']
+POSITIVE = [b'ARG NE', b'ARG NH1', b'ARG NH2', b'LYS NZ', b'HIS ND1', b'HIS NE2']
+NEGATIVE = [b'ASP OD1', b'ASP OD2', b'GLU OE1', b'GLU OE2']
+DISULFIDE = [b'CYS SG']
+BOND_TYPES = ('hydrogen_bond', 'salt_bridge', 'disulfide')
+# approximate_chain_interfaces takes the error of an interface as this many times the largest error, per square root
+# of interface residues, among the interfaces it computed at atom level to calibrate on, and at least this share of
+# its area; after the per structure scaling, residue level areas of larger interfaces were within 15 to 30 per cent
+# of the atom level ones on synthetic assemblies
+APPROXIMATE_ERROR_MARGIN = 2.0
+APPROXIMATE_RELATIVE_ERROR = 0.3
+# residue level areas below this are a handful of residues, whose ratio to the atom level area is too scattered to
+# calibrate on
+APPROXIMATE_CALIBRATION_AREA = 100.0
+# buried_surface only pools its blocks when the atoms to compute, times n_points / 100, times the share of the work
+# taken off the calling process (1 - 1 / workers), pass this. one process takes about 70 us per atom at 100 points
+# and starting a pool of two spawned workers about 0.7 s, so this is where the pool starts paying for itself: about
+# 20,000 atoms with 2 workers, 13,000 with 4 and 11,000 with 8
+POOL_BREAK_EVEN_ATOMS = 10000
+# the same for residue_contacts, with the atoms searched times (cutoff / 4) ** 3: at a cutoff of 4 angstroms one
+# process takes about 7 us per atom, a tenth of the surface time, so the pool starts paying for itself at about
+# 200,000 atoms with 2 workers and 130,000 with 4
+CONTACT_POOL_BREAK_EVEN_ATOMS = 100000
+
+
+# evenly spread unit vectors on a golden section spiral
+def sphere_points(n_points):
+    k = np.arange(n_points) + 0.5
+    z = 1 - 2 * k / n_points
+    r = np.sqrt(1 - z * z)
+    phi = np.pi * (3 - np.sqrt(5)) * k
+    return (np.column_stack([r * np.cos(phi), r * np.sin(phi), z]))
+
+
+def atom_radii(atoms):
+    return (np.array([VDW_RADII.get(element, DEFAULT_RADIUS) for element in atoms['element']]))
+
+
+class Cell_List:
+    # atoms binned into cubic cells as wide as the cutoff, so every neighbour is in one of the 27 surrounding cells
+    def __init__(self, coordinates, cutoff):
+        self.coordinates = np.asarray(coordinates, dtype=np.float64)
+        self.cutoff = cutoff
+        cells = np.floor((self.coordinates - self.coordinates.min(axis=0, initial=0)) / cutoff).astype(np.int64)
+        self.shape = cells.max(axis=0, initial=0) + 1
+        keys = self.cell_keys(cells)
+        # atoms sorted by cell; positions are where each atom sits in that order
+        self.order = np.argsort(keys, kind='stable')
+        self.positions = np.empty_like(self.order)
+        self.positions[self.order] = np.arange(len(self.order))
+        self.sorted_keys = keys[self.order]
+        self.sorted_cells = cells[self.order]
+        self.sorted_coordinates = self.coordinates[self.order]
+        # the occupied cells and where their atoms begin and end in cell order
+        self.occupied, self.cell_begin = np.unique(self.sorted_keys, return_index=True)
+        self.cell_end = np.r_[self.cell_begin[1:], len(self.order)]
+
+    def cell_keys(self, cells):
+        return ((cells[:, 0] * self.shape[1] + cells[:, 1]) * self.shape[2] + cells[:, 2])
+
+    # a cell list over arrays built elsewhere, e.g. by another process and attached from shared memory
+    @classmethod
+    def from_arrays(cls, arrays, cutoff, shape):
+        cell_list = cls.__new__(cls)
+        for name in CELL_LIST_ARRAYS:
+            setattr(cell_list, name, arrays[name])
+        cell_list.cutoff = cutoff
+        cell_list.shape = shape
+        return (cell_list)
+
+    def arrays(self):
+        return ({name: getattr(self, name) for name in CELL_LIST_ARRAYS})
+
+    # rough cost of each atom's neighbour search, in cell order: the number of atoms in the 27 cells around it
+    def atom_costs(self):
+        cells = self.sorted_cells[self.cell_begin]
+        counts = self.cell_end - self.cell_begin
+        costs = np.zeros(len(self.occupied), dtype=np.int64)
+        for offset in CELL_OFFSETS:
+            target = cells + offset
+            inside = np.flatnonzero(np.all((target >= 0) & (target < self.shape), axis=1))
+            target_keys = self.cell_keys(target[inside])
+            slots = np.minimum(np.searchsorted(self.occupied, target_keys), len(self.occupied) - 1)
+            occupied = self.occupied[slots] == target_keys
+            costs[inside[occupied]] += counts[slots[occupied]]
+        return (np.repeat(costs, counts))
+
+    # (atom, neighbour) index pairs closer than the cutoff for the given atoms; half keeps each pair of atoms once.
+    # the given atoms are taken cell by cell, and each of their cells is paired with every atom of the
+    # neighbouring cells at once, so the lookups are per cell rather than per atom
+    def neighbors(self, atoms, half=False):
+        sources = np.sort(self.positions[atoms])
+        source_keys = self.sorted_keys[sources]
+        run_starts = np.flatnonzero(np.r_[True, source_keys[1:] != source_keys[:-1]]) if len(sources) else \
+            np.empty(0, dtype=np.int64)
+        run_counts = np.diff(np.r_[run_starts, len(sources)])
+        run_cells = self.sorted_cells[sources[run_starts]]
+        found_i = [np.empty(0, dtype=np.int64)]
+        found_j = [np.empty(0, dtype=np.int64)]
+        for k, offset in enumerate(CELL_OFFSETS[:14] if half else CELL_OFFSETS):
+            target = run_cells + offset
+            runs = np.flatnonzero(np.all((target >= 0) & (target < self.shape), axis=1))
+            target_keys = self.cell_keys(target[runs])
+            slots = np.minimum(np.searchsorted(self.occupied, target_keys), len(self.occupied) - 1)
+            occupied = self.occupied[slots] == target_keys
+            runs, slots = runs[occupied], slots[occupied]
+            source_counts = run_counts[runs]
+            target_counts = self.cell_end[slots] - self.cell_begin[slots]
+            # every source atom of a run against every atom of its target cell
+            totals = source_counts * target_counts
+            pair_runs = np.repeat(np.arange(len(runs)), totals)
+            local = np.arange(totals.sum()) - np.repeat(np.cumsum(totals) - totals, totals)
+            pair_targets = target_counts[pair_runs]
+            i = sources[run_starts[runs][pair_runs] + local // pair_targets]
+            j = self.cell_begin[slots][pair_runs] + local % pair_targets
+            close = np.sum((self.sorted_coordinates[i] - self.sorted_coordinates[j]) ** 2, axis=1) < self.cutoff ** 2
+            # in its own cell an atom only pairs with the atoms after it when halving, and never with itself
+            close &= (j > i) if (k == 0 and half) else (i != j)
+            found_i.append(self.order[i[close]])
+            found_j.append(self.order[j[close]])
+        return (np.concatenate(found_i), np.concatenate(found_j))
+
+    # blocks of neighbouring atoms in cell order, which keeps each block's atoms close together in space
+    def blocks(self, block_size):
+        for start in range(0, len(self.order), block_size):
+            yield (self.order[start:start + block_size])
+
+
+# index pairs of atoms closer than cutoff, each pair once, in blocks of at most block_size atoms' pairs
+def neighbor_pairs(coordinates, cutoff, block_size=1 << 14):
+    cell_list = Cell_List(coordinates, cutoff)
+    for block in cell_list.blocks(block_size):
+        yield (cell_list.neighbors(block, half=True))
+
+
+# per chain bounding boxes (low and high corners) and bounding spheres (centres and radii)
+def chain_bounds(coordinates, chain_index, chain_count):
+    order = np.argsort(chain_index, kind='stable')
+    coordinates = np.asarray(coordinates, dtype=np.float64)[order]
+    starts = np.searchsorted(chain_index[order], np.arange(chain_count))
+    low = np.minimum.reduceat(coordinates, starts, axis=0)
+    high = np.maximum.reduceat(coordinates, starts, axis=0)
+    centres = (low + high) / 2
+    distances = np.sqrt(np.sum((coordinates - centres[chain_index[order]]) ** 2, axis=1))
+    return (low, high, centres, np.maximum.reduceat(distances, starts))
+
+
+# the broad phase: chain pairs whose bounding boxes and spheres, grown by cutoff, overlap, found by sweeping the
+# boxes in order of their low x corner; returns the pairs and how many of all chain pairs were pruned
+def candidate_chain_pairs(coordinates, chain_index, cutoff):
+    chain_count = chain_index.max(initial=-1) + 1
+    all_pairs = chain_count * (chain_count - 1) // 2
+    if chain_count < 2:
+        return (np.empty((0, 2), dtype=np.int64), all_pairs)
+    low, high, centres, radii = chain_bounds(coordinates, chain_index, chain_count)
+    sweep = np.argsort(low[:, 0], kind='stable')
+    # the chains after each one in the sweep that start before it ends, cutoff included
+    ends = np.searchsorted(low[sweep, 0], high[sweep, 0] + cutoff, side='right')
+    counts = np.maximum(ends - np.arange(chain_count) - 1, 0)
+    first = np.repeat(np.arange(chain_count), counts)
+    second = first + 1 + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    a, b = sweep[first], sweep[second]
+    overlap = np.all((low[a] <= high[b] + cutoff) & (low[b] <= high[a] + cutoff), axis=1)
+    overlap &= np.sqrt(np.sum((centres[a] - centres[b]) ** 2, axis=1)) <= radii[a] + radii[b] + cutoff
+    pairs = np.sort(np.column_stack([a, b])[overlap], axis=1)
+    return (pairs, all_pairs - len(pairs))
+
+
+# the atoms that lie within cutoff of the bounding box of a chain they are paired with; only these can be
+# closer than cutoff to an atom of another chain
+def paired_atoms(coordinates, chain_index, pairs, cutoff):
+    coordinates = np.asarray(coordinates, dtype=np.float64)
+    chain_count = chain_index.max(initial=-1) + 1
+    near = np.zeros(len(coordinates), dtype=bool)
+    if len(pairs) == 0:
+        return (np.flatnonzero(near))
+    low, high = chain_bounds(coordinates, chain_index, chain_count)[:2]
+    order = np.argsort(chain_index, kind='stable')
+    starts = np.searchsorted(chain_index[order], np.arange(chain_count + 1))
+    both_ways = np.concatenate([pairs, pairs[:, ::-1]])
+    for chain in np.unique(both_ways[:, 0]):
+        partners = both_ways[both_ways[:, 0] == chain, 1]
+        members = order[starts[chain]:starts[chain + 1]]
+        inside = np.all((coordinates[members, None, :] >= low[partners] - cutoff)
+                        & (coordinates[members, None, :] <= high[partners] + cutoff), axis=2)
+        near[members] = inside.any(axis=1)
+    return (np.flatnonzero(near))
+
+
+# packed bits marking the surface points of atom i that lie inside the probe-expanded sphere of atom j;
+# |c_i + r_i p - c_j|^2 < r_j^2 is a threshold on p . (c_j - c_i), so one matrix product tests every point
+def occluded_points(coordinates, radii, points, i, j):
+    offsets = coordinates[j] - coordinates[i]
+    thresholds = (radii[i] ** 2 + np.sum(offsets ** 2, axis=1) - radii[j] ** 2) / (2 * radii[i])
+    return (np.packbits(offsets @ points.T > thresholds[:, None], axis=1))
+
+
+# bitwise or of the packed rows within each run of equal group values
+def reduce_runs(packed, groups):
+    if len(groups) == 0:
+        return (np.empty(0, dtype=np.int64), packed)
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    return (starts, np.bitwise_or.reduceat(packed, starts, axis=0))
+
+
+def count_bits(packed):
+    return (BIT_COUNTS[packed].sum(axis=1))
+
+
+# shrake-rupley surface, in its own chain, of the atoms of one block and the part of it each other chain buries:
+# returns the atoms with own chain neighbours and their sasa, then (atom, other chain, buried area) rows
+def block_surface(cell_list, radii, chain_index, chain_count, points, point_area, block):
+    coordinates = cell_list.coordinates
+    n_points = len(points)
+    atom, other = cell_list.neighbors(block)
+    touching = np.sum((coordinates[atom] - coordinates[other]) ** 2, axis=1) < (radii[atom] + radii[other]) ** 2
+    atom, other = atom[touching], other[touching]
+    # grouped by atom and then by the chain doing the burying
+    order = np.lexsort((chain_index[other], atom))
+    block_atom, other = atom[order], other[order]
+    block_chain = chain_index[other]
+    packed = occluded_points(coordinates, radii, points, block_atom, other)
+    same_chain = block_chain == chain_index[block_atom]
+    starts, own_packed = reduce_runs(packed[same_chain], block_atom[same_chain])
+    own_atoms = block_atom[same_chain][starts]
+    own_sasa = point_area[own_atoms] * (n_points - count_bits(own_packed))
+    group = block_atom[~same_chain] * chain_count + block_chain[~same_chain]
+    starts, other_packed = reduce_runs(packed[~same_chain], group)
+    group_atoms = block_atom[~same_chain][starts]
+    # points already covered by the atom's own chain are not buried by the other one
+    own = np.zeros_like(other_packed)
+    if len(own_atoms) != 0:
+        k = np.minimum(np.searchsorted(own_atoms, group_atoms), len(own_atoms) - 1)
+        has_own = own_atoms[k] == group_atoms
+        own[has_own] = own_packed[k[has_own]]
+    return (own_atoms, own_sasa, group_atoms, block_chain[~same_chain][starts],
+            point_area[group_atoms] * count_bits(other_packed & ~own))
+
+
+# copies arrays into shared memory; returns the shared blocks, to close and unlink once done, and the layout
+# other processes attach them by
+def share_arrays(arrays):
+    blocks = []
+    layout = {}
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        layout[name] = (block.name, array.shape, array.dtype.str)
+    return (blocks, layout)
+
+
+def attach_arrays(layout):
+    blocks = []
+    arrays = {}
+    for name, (block_name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    return (blocks, arrays)
+
+
+# the arrays a surface worker process attached, kept for the life of the process
+SURFACE_WORKER = {}
+
+
+def start_surface_worker(layout, cutoff, shape, n_points):
+    blocks, arrays = attach_arrays(layout)
+    SURFACE_WORKER['blocks'] = blocks
+    SURFACE_WORKER['cell_list'] = Cell_List.from_arrays(arrays, cutoff, shape)
+    SURFACE_WORKER['radii'] = arrays['radii']
+    SURFACE_WORKER['chain_index'] = arrays['chain_index']
+    SURFACE_WORKER['block_order'] = arrays['block_order']
+    SURFACE_WORKER['chain_count'] = arrays['chain_index'].max(initial=0) + 1
+    SURFACE_WORKER['points'] = sphere_points(n_points)
+    SURFACE_WORKER['point_area'] = 4 * np.pi * arrays['radii'] ** 2 / n_points
+
+
+def surface_worker_block(start, stop):
+    return (block_surface(SURFACE_WORKER['cell_list'], SURFACE_WORKER['radii'], SURFACE_WORKER['chain_index'],
+                          SURFACE_WORKER['chain_count'], SURFACE_WORKER['points'], SURFACE_WORKER['point_area'],
+                          SURFACE_WORKER['block_order'][start:stop]))
+
+
+# block results from a pool of worker processes that share the cell list, radii and chains through shared
+# memory; the blocks go out costliest first, so the pool is not left waiting on one long block at the end
+def pooled_block_surfaces(cell_list, radii, chain_index, n_points, block_order, bounds, workers):
+    costs = np.r_[0, np.cumsum(cell_list.atom_costs()[cell_list.positions[block_order]])]
+    block_costs = np.array([costs[stop] - costs[start] for start, stop in bounds])
+    shared, layout = share_arrays(dict(cell_list.arrays(), radii=radii, chain_index=chain_index,
+                                       block_order=block_order))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_surface_worker,
+                                 initargs=(layout, cell_list.cutoff, cell_list.shape, n_points)) as executor:
+            futures = {}
+            for k in np.argsort(-block_costs, kind='stable'):
+                futures[k] = executor.submit(surface_worker_block, *bounds[k])
+            for k in range(len(bounds)):
+                yield (futures[k].result())
+    finally:
+        for block in shared:
+            block.close()
+            block.unlink()
+
+
+# shrake-rupley surface of every atom in its own chain, and the part of it each other chain buries
+# returns the chain-alone sasa per atom and (atom, other chain, buried area) rows; with workers above 1, and enough
+# atoms for the pool to pay off (see POOL_BREAK_EVEN_ATOMS), the blocks are spread over that many processes, at
+# most one per core, with the same result. targets, a mask, limits the surfaces computed to those atoms; the others
+# only cover them and keep their whole sphere as sasa
+def buried_surface(coordinates, radii, chain_index, n_points=100, block_size=1 << 10, workers=1, targets=None):
+    points = sphere_points(n_points)
+    point_area = 4 * np.pi * radii ** 2 / n_points
+    cell_list = Cell_List(coordinates, 2 * radii.max(initial=0))
+    sasa = point_area * n_points
+    block_order = cell_list.order if targets is None else cell_list.order[targets[cell_list.order]]
+    bounds = [(start, min(start + block_size, len(block_order))) for start in range(0, len(block_order), block_size)]
+    workers = min(workers, os.cpu_count() or 1, len(bounds))
+    if workers > 1 and len(block_order) * n_points / 100 * (1 - 1 / workers) > POOL_BREAK_EVEN_ATOMS:
+        results = pooled_block_surfaces(cell_list, radii, chain_index, n_points, block_order, bounds, workers)
+    else:
+        chain_count = chain_index.max(initial=0) + 1
+        results = (block_surface(cell_list, radii, chain_index, chain_count, points, point_area,
+                                 block_order[start:stop]) for start, stop in bounds)
+    buried_atoms = [np.empty(0, dtype=np.int64)]
+    buried_chains = [np.empty(0, dtype=np.int64)]
+    buried_areas = [np.empty(0)]
+    for own_atoms, own_sasa, group_atoms, group_chains, group_areas in results:
+        sasa[own_atoms] = own_sasa
+        buried_atoms.append(group_atoms)
+        buried_chains.append(group_chains)
+        buried_areas.append(group_areas)
+    return (sasa, np.concatenate(buried_atoms), np.concatenate(buried_chains), np.concatenate(buried_areas))
+
+
+# chain pair interfaces of a structure from buried surface area, largest first, in the terms of the pisa table.
+# mates are the symmetry copies from Crystal_Symmetry.symmetry_mates; with them the crystal contacts between a
+# chain and a copy of a chain are found as well, each told apart by the x, y, z and sym id of the copy.
+# attrs['chain_surfaces'] holds the surface of every chain, interfaces or not. radii, when given, stand in for the
+# element radii of atoms. targets, a mask over atoms, limits the surface computation to those atoms, which is
+# enough for the interfaces when they include every atom within reach of another chain; the chain surfaces then
+# are not what they should be
+def chain_interfaces(atoms, n_points=100, probe_radius=PROBE_RADIUS, mates=None, workers=1, radii=None,
+                     targets=None):
+    if radii is None:
+        radii = atom_radii(atoms)
+    if mates is not None:
+        mate_atoms, mate_images, transforms, descriptions = mates
+        images = np.concatenate([np.zeros(len(atoms), dtype=np.int64), mate_images])
+        radii = np.concatenate([radii, atom_radii(mate_atoms)])
+        atoms = np.concatenate([atoms, mate_atoms])
+    else:
+        images = np.zeros(len(atoms), dtype=np.int64)
+    kept = ~np.isin(atoms['element'], HYDROGENS)
+    atoms = atoms[kept]
+    images = images[kept]
+    coordinates = atoms['coordinates'].astype(np.float64)
+    radii = radii[kept] + probe_radius
+    chains, chain_index = np.unique(atoms['chain'], return_inverse=True)
+    # every copy of a chain is a unit of its own; the chains themselves come first
+    units, unit_index = np.unique(images * len(chains) + chain_index, return_inverse=True)
+    unit_chain = units % len(chains)
+    unit_image = units // len(chains)
+    residues = pd.DataFrame({'unit': unit_index, 'number': atoms['residue_number'],
+                             'insertion_code': atoms['insertion_code']}).groupby(
+        ['unit', 'number', 'insertion_code'], sort=False).ngroup().to_numpy()
+    sasa, buried_atoms, buried_chains, buried_areas = buried_surface(
+        coordinates, radii, unit_index, n_points, workers=workers, targets=None if targets is None else targets[kept])
+    # a copy has the surface of the chain it copies
+    chain_surface = np.bincount(chain_index[images == 0], weights=sasa[images == 0], minlength=len(chains))
+    buried = buried_areas > 0
+    sides = pd.DataFrame({'chain': unit_index[buried_atoms[buried]], 'partner': buried_chains[buried],
+                          'atom': buried_atoms[buried], 'residue': residues[buried_atoms[buried]],
+                          'area': buried_areas[buried]})
+    sides = sides.groupby(['chain', 'partner']).agg(atoms=('atom', 'nunique'), residues=('residue', 'nunique'),
+                                                     area=('area', 'sum')).reset_index()
+    first = sides[sides['chain'] < sides['partner']]
+    second = sides[sides['chain'] > sides['partner']].rename(
+        columns={'chain': 'partner', 'partner': 'chain'})
+    # each side's buried area counts half towards the interface area
+    pairs = first.merge(second, on=['chain', 'partner'], how='outer', suffixes=('_1', '_2')).fillna(0)
+    pairs = pairs.astype({'chain': int, 'partner': int, 'atoms_1': int, 'atoms_2': int,
+                          'residues_1': int, 'residues_2': int})
+    # contacts between two copies repeat one between a chain and a copy
+    pairs = pairs[unit_image[pairs['chain'].to_numpy()] == 0]
+    first_units = pairs['chain'].to_numpy()
+    second_units = pairs['partner'].to_numpy()
+    interfaces = pd.DataFrame({
+        'chain_1': chains[unit_chain[first_units]].astype(str),
+        'atoms_1': pairs['atoms_1'].to_numpy(), 'residues_1': pairs['residues_1'].to_numpy(),
+        'surface_1': chain_surface[unit_chain[first_units]],
+        'chain_2': chains[unit_chain[second_units]].astype(str),
+        'atoms_2': pairs['atoms_2'].to_numpy(), 'residues_2': pairs['residues_2'].to_numpy(),
+        'surface_2': chain_surface[unit_chain[second_units]],
+        'interface_area': (pairs['area_1'].to_numpy() + pairs['area_2'].to_numpy()) / 2})
+    chain_surfaces = dict(zip(chains.astype(str), chain_surface))
+    if mates is not None:
+        interfaces['image'] = unit_image[second_units]
+        interfaces = interfaces.sort_values('interface_area', ascending=False, kind='stable')
+        interfaces = interfaces[unique_contacts(interfaces, transforms)]
+        identity = ['x', 'y', 'z', '1_555']
+        for k, column in enumerate(['x', 'y', 'z', 'symmetry_id']):
+            interfaces[column] = [identity[k] if image == 0 else descriptions[image - 1][k]
+                                  for image in interfaces['image']]
+        interfaces = interfaces.drop(columns='image')
+    interfaces = interfaces.sort_values('interface_area', ascending=False, kind='stable').reset_index(drop=True)
+    interfaces.attrs['chain_surfaces'] = chain_surfaces
+    return (interfaces)
+
+
+# a hash of each chain's atom records, chain id included, keyed by chain id
+def chain_fingerprints(atoms):
+    chains, chain_index = np.unique(atoms['chain'], return_inverse=True)
+    order = np.argsort(chain_index, kind='stable')
+    starts = np.searchsorted(chain_index[order], np.arange(len(chains) + 1))
+    records = np.ascontiguousarray(atoms[order])
+    return ({chain.decode('latin-1'): hashlib.sha256(records[starts[k]:starts[k + 1]].tobytes()).hexdigest()
+             for k, chain in enumerate(chains)})
+
+
+# chain_interfaces through a cache of per chain surfaces and per chain pair interfaces: the surface of a chain
+# and its interface with another depend on those two chains alone, so only the chains that changed since the
+# cached run (or whose entries are missing) are computed again, on just their atoms and the atoms around them.
+# attrs['recomputed_chains'] names them
+def incremental_chain_interfaces(atoms, cache, n_points=100, probe_radius=PROBE_RADIUS, workers=1):
+    fingerprints = chain_fingerprints(atoms)
+    settings = '{}_{}'.format(n_points, probe_radius)
+
+    def chain_key(chain):
+        return (hashlib.sha256((fingerprints[chain] + settings).encode()).hexdigest())
+
+    def pair_key(chain_1, chain_2):
+        return (hashlib.sha256((fingerprints[chain_1] + fingerprints[chain_2] + settings).encode()).hexdigest())
+
+    heavy = atoms[~np.isin(atoms['element'], HYDROGENS)]
+    chains, chain_index = np.unique(heavy['chain'], return_inverse=True)
+    chains = chains.astype(str)
+    # atoms further apart than this never bury each other
+    cutoff = 2 * (atom_radii(heavy) + probe_radius).max(initial=0)
+    pairs = candidate_chain_pairs(heavy['coordinates'], chain_index, cutoff)[0]
+    surfaces = {chain: cache.get(chain_key(chain), 'chain_surface') for chain in chains}
+    changed = {chain for chain, surface in surfaces.items() if surface is None}
+    found = {}
+    for a, b in pairs:
+        if chains[a] not in changed and chains[b] not in changed:
+            found[a, b] = cache.get(pair_key(chains[a], chains[b]), 'pair_interface')
+            if found[a, b] is None:
+                changed.update((chains[a], chains[b]))
+    if changed:
+        # the changed chains, and the atoms of the others close enough to matter for their own surface
+        redo = np.flatnonzero(np.isin(chains, sorted(changed)))
+        redo_pairs = pairs[np.isin(pairs, redo).any(axis=1)]
+        nearby = np.zeros(len(heavy), dtype=bool)
+        nearby[paired_atoms(heavy['coordinates'], chain_index, redo_pairs, 2 * cutoff)] = True
+        nearby |= np.isin(chain_index, redo)
+        computed = chain_interfaces(heavy[nearby], n_points, probe_radius, workers=workers)
+        for interface in computed.itertuples(index=False):
+            if interface.chain_1 in changed or interface.chain_2 in changed:
+                found[tuple(np.searchsorted(chains, [interface.chain_1, interface.chain_2]))] = {
+                    'atoms_1': int(interface.atoms_1), 'residues_1': int(interface.residues_1),
+                    'atoms_2': int(interface.atoms_2), 'residues_2': int(interface.residues_2),
+                    'interface_area': float(interface.interface_area)}
+        for chain in changed:
+            surfaces[chain] = float(computed.attrs['chain_surfaces'][chain])
+            cache.put(chain_key(chain), 'chain_surface', surfaces[chain])
+        for a, b in redo_pairs:
+            found.setdefault((a, b), {})
+            cache.put(pair_key(chains[a], chains[b]), 'pair_interface', found[a, b])
+    rows = [dict(chain_1=chains[a], atoms_1=int(found[a, b]['atoms_1']), residues_1=int(found[a, b]['residues_1']),
+                 surface_1=surfaces[chains[a]], chain_2=chains[b], atoms_2=int(found[a, b]['atoms_2']),
+                 residues_2=int(found[a, b]['residues_2']), surface_2=surfaces[chains[b]],
+                 interface_area=found[a, b]['interface_area'])
+            for a, b in sorted(found) if found[a, b]]
+    interfaces = pd.DataFrame(rows, columns=['chain_1', 'atoms_1', 'residues_1', 'surface_1', 'chain_2', 'atoms_2',
+                                             'residues_2', 'surface_2', 'interface_area'])
+    interfaces = interfaces.sort_values('interface_area', ascending=False, kind='stable').reset_index(drop=True)
+    interfaces.attrs['recomputed_chains'] = sorted(changed)
+    return (interfaces)
+
+
+# one sphere per residue of the heavy atoms, at the centre of its atoms and as large as their spread around it plus
+# their mean radius; also the number of atoms each stands for
+def residue_spheres(atoms):
+    atoms = atoms[~np.isin(atoms['element'], HYDROGENS)]
+    residues = pd.DataFrame({'chain': atoms['chain'], 'number': atoms['residue_number'],
+                             'insertion_code': atoms['insertion_code']}).groupby(
+        ['chain', 'number', 'insertion_code'], sort=False).ngroup().to_numpy()
+    counts = np.bincount(residues)
+    coordinates = atoms['coordinates'].astype(np.float64)
+    centres = np.column_stack([np.bincount(residues, weights=coordinates[:, k]) / counts for k in range(3)])
+    spread = np.bincount(residues, weights=((coordinates - centres[residues]) ** 2).sum(axis=1)) / counts
+    radii = np.sqrt(spread) + np.bincount(residues, weights=atom_radii(atoms)) / counts
+    spheres = atoms[np.unique(residues, return_index=True)[1]]
+    spheres['coordinates'] = centres
+    return (spheres, radii, counts)
+
+
+# atom level interfaces of the given chain pairs of heavy atoms; only the atoms within reach of the other chain of
+# their pair get surfaces, with the atoms around them to cover them. pairs without an interface are left out
+def atom_level_interfaces(heavy, chains, chain_index, pairs, cutoff, n_points, probe_radius, workers):
+    coordinates = heavy['coordinates']
+    pair_index = np.searchsorted(chains, np.array(pairs))
+    pair_keys = np.sort(pair_index, axis=1) @ [len(chains), 1]
+    close = paired_atoms(coordinates, chain_index, pair_index, cutoff)
+    targets = np.zeros(len(heavy), dtype=bool)
+    for i, j in neighbor_pairs(coordinates[close], cutoff):
+        first, second = chain_index[close[i]], chain_index[close[j]]
+        paired = np.isin(np.minimum(first, second) * len(chains) + np.maximum(first, second), pair_keys)
+        targets[close[i[paired]]] = True
+        targets[close[j[paired]]] = True
+    near = paired_atoms(coordinates, chain_index, pair_index, 2 * cutoff)
+    interfaces = chain_interfaces(heavy[near], n_points, probe_radius, workers=workers, targets=targets[near])
+    pairs = set(pairs)
+    return (interfaces[np.array([pair in pairs for pair in zip(interfaces['chain_1'], interfaces['chain_2'])],
+                                dtype=bool)])
+
+
+# chain_interfaces on one sphere per residue instead of every atom, for screening against min_area. the residue
+# level areas are calibrated on the calibration_pairs interfaces closest to min_area (of at least
+# APPROXIMATE_CALIBRATION_AREA), computed at atom level too, since those are the ones whose side of min_area is in
+# doubt anyway: they are scaled by the median ratio of atom to residue level area, and each interface gets an
+# interface_area_error of APPROXIMATE_ERROR_MARGIN times the largest calibration error per square root of interface
+# residues, times its own, or APPROXIMATE_RELATIVE_ERROR of its area if that is more. every interface whose area is
+# within its error of min_area, chain pairs in reach of each other without a residue level interface included, is
+# computed at atom level (error 0), so the time saved is in the interfaces far from min_area. atom counts are
+# estimated from the residue counts and the surfaces are those of the residue spheres. attrs['accurate_pairs'] is how
+# many pairs were computed at atom level
+def approximate_chain_interfaces(atoms, min_area=0.0, n_points=30, accurate_points=100, calibration_pairs=6,
+                                 probe_radius=PROBE_RADIUS, workers=1):
+    heavy = atoms[~np.isin(atoms['element'], HYDROGENS)]
+    chains, chain_index = np.unique(heavy['chain'], return_inverse=True)
+    chains = chains.astype(str)
+    spheres, sphere_radii, sphere_atoms = residue_spheres(heavy)
+    interfaces = chain_interfaces(spheres, n_points, probe_radius, workers=workers, radii=sphere_radii)
+    chain_surfaces = interfaces.attrs['chain_surfaces']
+    sphere_chains = np.searchsorted(chains, spheres['chain'].astype(str))
+    atoms_per_residue = dict(zip(chains, np.bincount(sphere_chains, weights=sphere_atoms)
+                                 / np.bincount(sphere_chains)))
+    for side in ('1', '2'):
+        interfaces['atoms_' + side] = np.rint(interfaces['residues_' + side].to_numpy() * np.array(
+            [atoms_per_residue[chain] for chain in interfaces['chain_' + side]])).astype(int)
+    # chain pairs within reach of each other but without a residue level interface, at area 0
+    cutoff = 2 * (atom_radii(heavy) + probe_radius).max(initial=0)
+    found = set(zip(interfaces['chain_1'], interfaces['chain_2']))
+    missing = [(chains[a], chains[b]) for a, b in candidate_chain_pairs(heavy['coordinates'], chain_index, cutoff)[0]
+               if (chains[a], chains[b]) not in found]
+    interfaces = pd.concat([interfaces, pd.DataFrame({
+        'chain_1': [a for a, b in missing], 'atoms_1': 0, 'residues_1': 0,
+        'surface_1': [chain_surfaces[a] for a, b in missing], 'chain_2': [b for a, b in missing], 'atoms_2': 0,
+        'residues_2': 0, 'surface_2': [chain_surfaces[b] for a, b in missing], 'interface_area': 0.0})],
+        ignore_index=True).astype({'atoms_1': int, 'residues_1': int, 'atoms_2': int, 'residues_2': int})
+    interfaces = interfaces.sort_values('interface_area', kind='stable').reset_index(drop=True)
+    pairs = list(zip(interfaces['chain_1'], interfaces['chain_2']))
+    residue_area = interfaces['interface_area'].to_numpy()
+    spread = np.sqrt(interfaces['residues_1'].to_numpy() + interfaces['residues_2'].to_numpy() + 1)
+    found = np.flatnonzero(residue_area >= APPROXIMATE_CALIBRATION_AREA)
+    if len(found) == 0:
+        found = np.flatnonzero(residue_area > 0)
+    nearest = np.argsort(np.abs(residue_area[found] - min_area), kind='stable')
+    calibration = np.sort(found[nearest[:calibration_pairs]])
+    accurate = {}
+    if len(calibration):
+        computed = atom_level_interfaces(heavy, chains, chain_index, [pairs[k] for k in calibration], cutoff,
+                                         accurate_points, probe_radius, workers)
+        accurate.update((pair, row) for pair, row in zip(zip(computed['chain_1'], computed['chain_2']),
+                                                          computed.itertuples(index=False)))
+    calibration_area = np.array([accurate[pairs[k]].interface_area if pairs[k] in accurate else 0.0
+                                 for k in calibration])
+    scale = np.median(calibration_area / residue_area[calibration]) if len(calibration) else 1.0
+    margin = APPROXIMATE_ERROR_MARGIN * np.max(
+        np.abs(calibration_area - scale * residue_area[calibration]) / spread[calibration], initial=0)
+    interfaces['interface_area'] = scale * residue_area
+    interfaces['interface_area_error'] = np.maximum(margin * spread,
+                                                   APPROXIMATE_RELATIVE_ERROR * interfaces['interface_area'])
+    # every interface that might lie on the other side of min_area
+    uncertain = np.abs(interfaces['interface_area'].to_numpy() - min_area) <= interfaces['interface_area_error']
+    uncertain[calibration] = False
+    recheck = [pairs[k] for k in np.flatnonzero(uncertain)]
+    if recheck:
+        computed = atom_level_interfaces(heavy, chains, chain_index, recheck, cutoff, accurate_points, probe_radius,
+                                         workers)
+        accurate.update((pair, row) for pair, row in zip(zip(computed['chain_1'], computed['chain_2']),
+                                                          computed.itertuples(index=False)))
+    exact = np.zeros(len(interfaces), dtype=bool)
+    exact[calibration] = True
+    exact[uncertain] = True
+    for k in np.flatnonzero(exact):
+        row = accurate.get(pairs[k])
+        for column in ('atoms_1', 'residues_1', 'atoms_2', 'residues_2', 'interface_area'):
+            interfaces.iat[k, interfaces.columns.get_loc(column)] = 0 if row is None else getattr(row, column)
+    interfaces.loc[exact, 'interface_area_error'] = 0.0
+    interfaces = interfaces[interfaces['interface_area'] > 0]
+    interfaces = interfaces.sort_values('interface_area', ascending=False, kind='stable').reset_index(drop=True)
+    interfaces.attrs['chain_surfaces'] = chain_surfaces
+    interfaces.attrs['accurate_pairs'] = int(exact.sum())
+    return (interfaces)
+
+
+# chain A against a copy of chain B made by T is the same contact as B against the copy of A made by T inverse;
+# keeps the first of each such couple
+def unique_contacts(interfaces, transforms):
+    kept = []
+    keep = np.ones(len(interfaces), dtype=bool)
+    for k, interface in enumerate(interfaces.itertuples(index=False)):
+        if interface.image == 0:
+            continue
+        rotation = transforms[interface.image - 1][:, :3]
+        offset = transforms[interface.image - 1][:, 3]
+        inverse = np.column_stack([rotation.T, -rotation.T @ offset])
+        for chain_1, chain_2, transform in kept:
+            if chain_1 == interface.chain_2 and chain_2 == interface.chain_1 and np.allclose(
+                    transform, inverse, atol=1e-3):
+                keep[k] = False
+                break
+        if keep[k]:
+            kept.append((interface.chain_1, interface.chain_2, transforms[interface.image - 1]))
+    return (keep)
+
+
+# chain pairs with atoms closer than cutoff, and how many atom pairs are that close, most contacts first;
+# attrs['pruned_chain_pairs'] is how many chain pairs the bounding volumes ruled out before any atom was looked at
+def chain_contacts(atoms, cutoff=4.0, block_size=1 << 14):
+    chains, chain_index = np.unique(atoms['chain'], return_inverse=True)
+    # only atoms near a chain whose bounds come within cutoff of their own are searched
+    pairs, pruned = candidate_chain_pairs(atoms['coordinates'], chain_index, cutoff)
+    near = paired_atoms(atoms['coordinates'], chain_index, pairs, cutoff)
+    chain_index = chain_index[near]
+    pair_keys = []
+    pair_counts = []
+    for i, j in neighbor_pairs(atoms['coordinates'][near], cutoff, block_size):
+        first = chain_index[i]
+        second = chain_index[j]
+        between = first != second
+        keys = np.minimum(first, second)[between] * len(chains) + np.maximum(first, second)[between]
+        keys, counts = np.unique(keys, return_counts=True)
+        pair_keys.append(keys)
+        pair_counts.append(counts)
+    contacts = pd.DataFrame({'key': np.concatenate(pair_keys + [np.empty(0, dtype=np.int64)]),
+                             'contacts': np.concatenate(pair_counts + [np.empty(0, dtype=np.int64)])})
+    contacts = contacts.groupby('key', sort=True)['contacts'].sum()
+    keys = contacts.index.to_numpy()
+    contacts = pd.DataFrame({'chain_1': chains[keys // len(chains)].astype(str),
+                             'chain_2': chains[keys % len(chains)].astype(str),
+                             'contacts': contacts.to_numpy()})
+    contacts = contacts.sort_values('contacts', ascending=False, kind='stable').reset_index(drop=True)
+    contacts.attrs['pruned_chain_pairs'] = pruned
+    return (contacts)
+
+
+# residue number of every atom, in file order, and each residue's label in pisa's form, e.g. A:ARG 45
+def residue_labels(atoms):
+    residues = pd.DataFrame({'chain': atoms['chain'], 'number': atoms['residue_number'],
+                             'insertion_code': atoms['insertion_code']}).groupby(
+        ['chain', 'number', 'insertion_code'], sort=False).ngroup().to_numpy()
+    first = np.unique(residues, return_index=True)[1]
+    labels = (pd.Series(atoms['chain'][first]).str.decode('latin-1') + ':'
+              + pd.Series(atoms['residue_name'][first]).str.decode('latin-1') + ' '
+              + pd.Series(atoms['residue_number'][first]).astype(str)
+              + pd.Series(atoms['insertion_code'][first]).str.decode('latin-1').str.strip())
+    return (residues, labels.to_numpy(dtype=object))
+
+
+# residue pair keys (lesser residue * residue_count + greater) of the atom pairs of one block of a cell list over the
+# searched atoms, and how many atom pairs each has
+def block_residue_contacts(cell_list, searched, residues, chain_index, residue_count, between_chains_only, block):
+    i, j = cell_list.neighbors(block, half=True)
+    i, j = searched[i], searched[j]
+    first = residues[i]
+    second = residues[j]
+    between = first != second
+    if between_chains_only:
+        between &= chain_index[i] != chain_index[j]
+    keys = np.minimum(first, second)[between] * residue_count + np.maximum(first, second)[between]
+    return (np.unique(keys, return_counts=True))
+
+
+# the arrays a contact worker process attached, kept for the life of the process
+CONTACT_WORKER = {}
+
+
+def start_contact_worker(layout, cutoff, shape, residue_count, between_chains_only):
+    blocks, arrays = attach_arrays(layout)
+    CONTACT_WORKER['blocks'] = blocks
+    CONTACT_WORKER['cell_list'] = Cell_List.from_arrays(arrays, cutoff, shape)
+    CONTACT_WORKER['searched'] = arrays['searched']
+    CONTACT_WORKER['residues'] = arrays['residues']
+    CONTACT_WORKER['chain_index'] = arrays['chain_index']
+    CONTACT_WORKER['residue_count'] = residue_count
+    CONTACT_WORKER['between_chains_only'] = between_chains_only
+
+
+def contact_worker_block(start, stop):
+    return (block_residue_contacts(CONTACT_WORKER['cell_list'], CONTACT_WORKER['searched'],
+                                   CONTACT_WORKER['residues'], CONTACT_WORKER['chain_index'],
+                                   CONTACT_WORKER['residue_count'], CONTACT_WORKER['between_chains_only'],
+                                   CONTACT_WORKER['cell_list'].order[start:stop]))
+
+
+# block results from a pool of worker processes that share the cell list, residues and chains through shared memory
+def pooled_residue_contacts(cell_list, searched, residues, chain_index, residue_count, between_chains_only, bounds,
+                            workers):
+    shared, layout = share_arrays(dict(cell_list.arrays(), searched=searched, residues=residues,
+                                       chain_index=chain_index))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=start_contact_worker,
+                                 initargs=(layout, cell_list.cutoff, cell_list.shape, residue_count,
+                                           between_chains_only)) as executor:
+            futures = [executor.submit(contact_worker_block, start, stop) for start, stop in bounds]
+            for future in futures:
+                yield (future.result())
+    finally:
+        for block in shared:
+            block.close()
+            block.unlink()
+
+
+# residue pairs with atoms closer than cutoff, and how many atom pairs are that close, most contacts first. with
+# workers above 1, and enough atoms for the pool to pay off (see CONTACT_POOL_BREAK_EVEN_ATOMS), the blocks of the
+# cell list are spread over that many processes, at most one per core, with the same result. between chains only,
+# chain pairs are pruned by their bounding volumes first, as in chain_contacts
+def residue_contacts(atoms, cutoff=4.0, block_size=1 << 14, between_chains_only=False, workers=1):
+    residues, labels = residue_labels(atoms)
+    chain_index = np.unique(atoms['chain'], return_inverse=True)[1]
+    searched = np.arange(len(atoms))
+    pruned = 0
+    if between_chains_only:
+        pairs, pruned = candidate_chain_pairs(atoms['coordinates'], chain_index, cutoff)
+        searched = paired_atoms(atoms['coordinates'], chain_index, pairs, cutoff)
+    cell_list = Cell_List(atoms['coordinates'][searched], cutoff)
+    bounds = [(start, min(start + block_size, len(searched))) for start in range(0, len(searched), block_size)]
+    workers = min(workers, os.cpu_count() or 1, len(bounds))
+    if workers > 1 and len(searched) * (cutoff / 4) ** 3 * (1 - 1 / workers) > CONTACT_POOL_BREAK_EVEN_ATOMS:
+        found = list(pooled_residue_contacts(cell_list, searched, residues, chain_index, len(labels),
+                                             between_chains_only, bounds, workers))
+    else:
+        found = [block_residue_contacts(cell_list, searched, residues, chain_index, len(labels), between_chains_only,
+                                        cell_list.order[start:stop]) for start, stop in bounds]
+    # a residue pair split over blocks is counted in each of them
+    keys, pair_index = np.unique(np.concatenate([keys for keys, counts in found] + [np.empty(0, dtype=np.int64)]),
+                                 return_inverse=True)
+    counts = np.bincount(pair_index, weights=np.concatenate([counts for keys, counts in found] + [np.empty(0)]),
+                         minlength=len(keys)).astype(np.int64)
+    contacts = pd.DataFrame({'residue_1': labels[keys // len(labels)], 'residue_2': labels[keys % len(labels)],
+                             'contacts': counts})
+    contacts = contacts.sort_values('contacts', ascending=False, kind='stable').reset_index(drop=True)
+    contacts.attrs['pruned_chain_pairs'] = pruned
+    return (contacts)
+
+
+# hydrogen bonds, salt bridges and disulfides between chains, one row per atom pair, found from heavy atom
+# distances alone: donor and acceptor within hydrogen_bond_cutoff, opposite charges within salt_bridge_cutoff and
+# two cysteine sulphurs within disulfide_cutoff; chain_1 is always the lesser chain. chain pairs are pruned by
+# their bounding volumes first, as in chain_contacts
+def interface_bonds(atoms, hydrogen_bond_cutoff=3.5, salt_bridge_cutoff=4.0, disulfide_cutoff=2.5):
+    residues, labels = residue_labels(atoms)
+    polar = np.flatnonzero(np.isin(atoms['element'], (b'N', b'O', b'S')))
+    sites = np.char.add(np.char.add(atoms['residue_name'][polar], b' '), atoms['atom_name'][polar])
+    atom_names = atoms['atom_name'][polar]
+    donor = np.isin(sites, DONORS) | ((atom_names == b'N') & (atoms['residue_name'][polar] != b'PRO'))
+    acceptor = np.isin(sites, ACCEPTORS) | (atom_names == b'O') | (atom_names == b'OXT')
+    positive = np.isin(sites, POSITIVE)
+    negative = np.isin(sites, NEGATIVE) | (atom_names == b'OXT')
+    sulphur = np.isin(sites, DISULFIDE)
+    keep = donor | acceptor | positive | negative | sulphur
+    cutoff = max(hydrogen_bond_cutoff, salt_bridge_cutoff, disulfide_cutoff)
+    polar_chains = np.unique(atoms['chain'][polar], return_inverse=True)[1]
+    pairs, pruned = candidate_chain_pairs(atoms['coordinates'][polar], polar_chains, cutoff)
+    near = np.zeros(len(polar), dtype=bool)
+    near[paired_atoms(atoms['coordinates'][polar], polar_chains, pairs, cutoff)] = True
+    keep &= near
+    polar = polar[keep]
+    donor, acceptor, positive, negative, sulphur = (donor[keep], acceptor[keep], positive[keep], negative[keep],
+                                                    sulphur[keep])
+    coordinates = atoms['coordinates'][polar].astype(np.float64)
+    chains = atoms['chain'][polar]
+    bonds = []
+    for i, j in neighbor_pairs(coordinates, cutoff):
+        between = chains[i] != chains[j]
+        i, j = i[between], j[between]
+        distance = np.sqrt(np.sum((coordinates[i] - coordinates[j]) ** 2, axis=1))
+        found = [((donor[i] & acceptor[j]) | (acceptor[i] & donor[j])) & (distance <= hydrogen_bond_cutoff),
+                 ((positive[i] & negative[j]) | (negative[i] & positive[j])) & (distance <= salt_bridge_cutoff),
+                 sulphur[i] & sulphur[j] & (distance <= disulfide_cutoff)]
+        for bond_type, bonded in zip(BOND_TYPES, found):
+            # the lesser chain first
+            swap = chains[i[bonded]] > chains[j[bonded]]
+            first = np.where(swap, j[bonded], i[bonded])
+            second = np.where(swap, i[bonded], j[bonded])
+            bonds.append(pd.DataFrame({'type': bond_type, 'first': polar[first], 'second': polar[second],
+                                       'distance': distance[bonded]}))
+    bonds = pd.concat(bonds + [pd.DataFrame(columns=['type', 'first', 'second', 'distance'])], ignore_index=True)
+    first = bonds['first'].to_numpy(dtype=np.int64)
+    second = bonds['second'].to_numpy(dtype=np.int64)
+    bonds = pd.DataFrame({'chain_1': atoms['chain'][first].astype(str), 'residue_1': labels[residues[first]],
+                          'atom_1': atoms['atom_name'][first].astype(str),
+                          'chain_2': atoms['chain'][second].astype(str), 'residue_2': labels[residues[second]],
+                          'atom_2': atoms['atom_name'][second].astype(str),
+                          'type': bonds['type'].to_numpy(dtype=object), 'distance': bonds['distance'].to_numpy(float)})
+    bonds = bonds.sort_values(['chain_1', 'chain_2', 'type', 'distance'], kind='stable').reset_index(drop=True)
+    bonds.attrs['pruned_chain_pairs'] = pruned
+    return (bonds)
+
+
+# bond counts of every chain pair with any bonds, and the residue pairs behind each kind, e.g. A:ARG 45-B:ASP 12,
+# joined by ';'
+def chain_bonds(bonds):
+    pairs = bonds.assign(residues=bonds['residue_1'] + '-' + bonds['residue_2'])
+    counts = pd.crosstab([pairs['chain_1'], pairs['chain_2']], pairs['type']).reindex(
+        columns=list(BOND_TYPES), fill_value=0)
+    residues = pairs.drop_duplicates(['chain_1', 'chain_2', 'type', 'residues']).groupby(
+        ['chain_1', 'chain_2', 'type'])['residues'].agg(';'.join).unstack('type').reindex(
+        columns=list(BOND_TYPES)).fillna('')
+    counts.columns = ['hydrogen_bonds', 'salt_bridges', 'disulfides']
+    residues.columns = ['hydrogen_bond_residues', 'salt_bridge_residues', 'disulfide_residues']
+    return (counts.join(residues).reset_index())
+
+
+# rows shaped like the pisa interfaces table, so the usual cleaning and edgelist stages read them; 22 columns
+# with the x, y, z and sym id of chain 2 when crystal contacts were computed, 18 otherwise. bond counts from
+# chain_bonds, when merged in, fill the hydrogen bond, salt bridge and disulfide columns
+def interfaces_rows(interfaces):
+    rows = []
+    for k, interface in enumerate(interfaces.itertuples(index=False)):
+        symmetry = []
+        bonds = ['', '', '']
+        if 'hydrogen_bonds' in interfaces.columns and not pd.isna(interface.hydrogen_bonds):
+            bonds = [str(int(interface.hydrogen_bonds)), str(int(interface.salt_bridges)),
+                     str(int(interface.disulfides))]
+        if 'symmetry_id' in interfaces.columns:
+            symmetry = [interface.x, interface.y, interface.z, interface.symmetry_id]
+        rows.append([str(k + 1), '', interface.chain_1, str(interface.atoms_1), str(interface.residues_1),
+                     '{:.1f}'.format(interface.surface_1), '', interface.chain_2] + symmetry
+                    + [str(interface.atoms_2), '', str(interface.residues_2),
+                       '{:.1f}'.format(interface.interface_area), '', ''] + bonds + [''])
+    return (rows)
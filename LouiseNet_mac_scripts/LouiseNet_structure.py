@@ -0,0 +1,415 @@
+from fractions import Fraction
+import gzip
+import itertools
+import numpy as np
+import os
+import re
+import shlex
+
+# one record per atom; byte strings keep the array compact and comparable without decoding
+ATOM_DTYPE = np.dtype([('chain', 'S4'), ('residue_name', 'S5'), ('residue_number', 'i4'),
+                       ('insertion_code', 'S1'), ('atom_name', 'S4'), ('element', 'S2'),
+                       ('coordinates', 'f4', (3,))])
+MMCIF_EXTENSIONS = ('.cif', '.mmcif')
+# symmetry operators of the space groups protein crystals most often take, for files without explicit operators
+SPACE_GROUP_OPERATORS = {
+    'P 1': ['x,y,z'],
+    'P 1 21 1': ['x,y,z', '-x,y+1/2,-z'],
+    'C 1 2 1': ['x,y,z', '-x,y,-z', 'x+1/2,y+1/2,z', '-x+1/2,y+1/2,-z'],
+    'P 2 2 2': ['x,y,z', '-x,-y,z', '-x,y,-z', 'x,-y,-z'],
+    'P 21 21 2': ['x,y,z', '-x,-y,z', '-x+1/2,y+1/2,-z', 'x+1/2,-y+1/2,-z'],
+    'P 21 21 21': ['x,y,z', '-x+1/2,-y,z+1/2', '-x,y+1/2,-z+1/2', 'x+1/2,-y+1/2,-z'],
+    'C 2 2 21': ['x,y,z', '-x,-y,z+1/2', '-x,y,-z+1/2', 'x,-y,-z',
+                 'x+1/2,y+1/2,z', '-x+1/2,-y+1/2,z+1/2', '-x+1/2,y+1/2,-z+1/2', 'x+1/2,-y+1/2,-z'],
+    'P 41 21 2': ['x,y,z', '-x,-y,z+1/2', '-y+1/2,x+1/2,z+1/4', 'y+1/2,-x+1/2,z+3/4',
+                  '-x+1/2,y+1/2,-z+1/4', 'x+1/2,-y+1/2,-z+3/4', 'y,x,-z', '-y,-x,-z+1/2'],
+    'P 43 21 2': ['x,y,z', '-x,-y,z+1/2', '-y+1/2,x+1/2,z+3/4', 'y+1/2,-x+1/2,z+1/4',
+                  '-x+1/2,y+1/2,-z+3/4', 'x+1/2,-y+1/2,-z+1/4', 'y,x,-z', '-y,-x,-z+1/2'],
+    'P 31 2 1': ['x,y,z', '-y,x-y,z+1/3', '-x+y,-x,z+2/3', 'y,x,-z', 'x-y,-y,-z+2/3', '-x,-x+y,-z+1/3'],
+    'P 32 2 1': ['x,y,z', '-y,x-y,z+2/3', '-x+y,-x,z+1/3', 'y,x,-z', 'x-y,-y,-z+1/3', '-x,-x+y,-z+2/3'],
+}
+SPACE_GROUP_ALIASES = {'P 21': 'P 1 21 1', 'C 2': 'C 1 2 1'}
+# text is parsed a chunk of whole lines at a time, so memory use doesn't grow with the file beyond the atoms kept
+CHUNK_SIZE = 1 << 22
+
+
+def open_structure_file(file_path):
+    if file_path.endswith('.gz'):
+        return (gzip.open(file_path, 'rb'))
+    return (open(file_path, 'rb'))
+
+
+# the file in chunks that end at a line break
+def read_chunks(f, chunk_size=CHUNK_SIZE, head=b''):
+    rest = head
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            if rest:
+                yield (rest if rest.endswith(b'\n') else rest + b'\n')
+            return
+        data = rest + data
+        cut = data.rfind(b'\n') + 1
+        rest = data[cut:]
+        if cut != 0:
+            yield (data[:cut])
+
+
+# bytes [starts, ends) of each row of raw padded with nulls to width, as a fixed width byte string array
+def gather_text(raw, starts, ends, width):
+    index = starts[:, None] + np.arange(width)
+    text = raw.take(index, mode='clip')
+    text[index >= ends[:, None]] = 0
+    return (text.view('S{}'.format(width)).ravel())
+
+
+# a fixed width pdb column without its padding spaces, left justified like str.strip() would leave it
+def strip_columns(lines, begin, end):
+    text = lines[:, begin:end].copy()
+    text[text == ord(' ')] = 0
+    lead = np.argmax(text != 0, axis=1)
+    index = np.arange(end - begin) + lead[:, None]
+    text = np.where(index < end - begin, np.take_along_axis(text, np.minimum(index, end - begin - 1), axis=1), 0)
+    return (np.ascontiguousarray(text.astype(np.uint8)).view('S{}'.format(end - begin)).ravel())
+
+
+# upper case of ascii byte strings without a python call per string
+def upper(text):
+    codes = np.ascontiguousarray(text).view(np.uint8).copy()
+    codes[(codes >= ord('a')) & (codes <= ord('z'))] -= 32
+    return (codes.view(text.dtype))
+
+
+# atoms of the ATOM/HETATM lines in a chunk of a pdb file, and whether the chunk reached the end of the first model
+def pdb_atoms(buffer):
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    ends = np.flatnonzero(raw == ord('\n'))
+    starts = np.r_[0, ends[:-1] + 1]
+    record = gather_text(raw, starts, ends, 6)
+    model_end = np.flatnonzero(record == b'ENDMDL')
+    if len(model_end) != 0:
+        starts, ends, record = starts[:model_end[0]], ends[:model_end[0]], record[:model_end[0]]
+    atom_lines = (record == b'ATOM') | (record == b'ATOM  ') | (record == b'HETATM')
+    starts, ends = starts[atom_lines], ends[atom_lines]
+    # carriage returns and short lines read as the spaces pdb pads with
+    index = starts[:, None] + np.arange(80)
+    lines = raw.take(index, mode='clip')
+    lines[index >= ends[:, None]] = ord(' ')
+    lines[lines == ord('\r')] = ord(' ')
+    # only the first alternate location of each atom
+    lines = lines[(lines[:, 16] == ord(' ')) | (lines[:, 16] == ord('A'))]
+    atoms = np.zeros(len(lines), dtype=ATOM_DTYPE)
+    atoms['chain'] = strip_columns(lines, 21, 22)
+    atoms['residue_name'] = strip_columns(lines, 17, 20)
+    atoms['residue_number'] = np.ascontiguousarray(lines[:, 22:26]).view('S4').ravel().astype(np.int32)
+    atoms['insertion_code'] = strip_columns(lines, 26, 27)
+    atoms['atom_name'] = strip_columns(lines, 12, 16)
+    for k, begin in enumerate((30, 38, 46)):
+        atoms['coordinates'][:, k] = np.ascontiguousarray(lines[:, begin:begin + 8]).view('S8').ravel().astype(np.float32)
+    element = strip_columns(lines, 76, 78)
+    # files that leave the element columns empty get the first letter of the atom name
+    missing = element == b''
+    if missing.any():
+        names = lines[missing, 12:16]
+        first_letter = np.argmax((names >= ord('A')) & (names <= ord('z')), axis=1)
+        element[missing] = names[np.arange(len(names)), first_letter].view('S1')
+    atoms['element'] = upper(element)
+    return (atoms, len(model_end) != 0)
+
+
+# atoms of the first model of a pdb file, read in chunks of whole lines
+def read_pdb(file_path, chunk_size=CHUNK_SIZE):
+    chunks = []
+    with open_structure_file(file_path) as f:
+        for buffer in read_chunks(f, chunk_size):
+            atoms, model_ended = pdb_atoms(buffer)
+            chunks.append(atoms)
+            if model_ended:
+                break
+    return (np.concatenate(chunks + [np.zeros(0, dtype=ATOM_DTYPE)]))
+
+
+# column names of the _atom_site loop, and the first data line after them
+def read_atom_site_header(f):
+    columns = []
+    for line in f:
+        if line.startswith(b'_atom_site.'):
+            columns.append(line.split(b'.', 1)[1].strip().decode())
+        elif len(columns) != 0:
+            return (columns, line)
+    return (columns, b'')
+
+
+# atoms of a chunk of _atom_site rows; returns the atoms, the model of the first row, whether the loop or
+# the first model ended in the chunk and the byte offset the rows read end at
+def mmcif_atoms(buffer, columns, first_model=None):
+    raw = np.frombuffer(buffer, dtype=np.uint8)
+    line_starts = np.r_[0, np.flatnonzero(raw[:-1] == ord('\n')) + 1]
+    # the loop ends at the next comment, item, loop or data block
+    line_heads = gather_text(raw, line_starts, np.full(len(line_starts), len(raw)), 5)
+    loop_end = np.flatnonzero((raw[line_starts] == ord('#')) | (raw[line_starts] == ord('_'))
+                              | (line_heads == b'loop_') | (line_heads == b'data_'))
+    ended = len(loop_end) != 0
+    if ended:
+        raw = raw[:line_starts[loop_end[0]]]
+    stop = len(raw)
+    # atom_site values never contain whitespace, quoted ones included, so tokens are runs of non-space bytes
+    space = raw <= ord(' ')
+    starts = np.flatnonzero(~space & np.r_[True, space[:-1]])
+    ends = np.flatnonzero(~space & np.r_[space[1:], True]) + 1
+    if len(starts) % len(columns) != 0:
+        raise ValueError('_atom_site rows with a missing or extra value')
+    # one row per column, so each column's tokens sit together in memory
+    starts = np.ascontiguousarray(starts.reshape(-1, len(columns)).T)
+    ends = np.ascontiguousarray(ends.reshape(-1, len(columns)).T)
+    field = {name: k for k, name in enumerate(columns)}
+
+    def value(name, width):
+        begin = starts[field[name]]
+        end = ends[field[name]]
+        first = raw[begin]
+        quoted = ((first == ord('"')) | (first == ord("'"))) & (end - begin > 1)
+        return (gather_text(raw, begin + quoted, end - quoted, width))
+
+    def first_of(names, width):
+        return (value(next(name for name in names if name in field), width))
+
+    keep = np.ones(starts.shape[1], dtype=bool)
+    if 'pdbx_PDB_model_num' in field:
+        models = value('pdbx_PDB_model_num', 8)
+        if first_model is None and len(models) != 0:
+            first_model = models[0]
+        other_model = np.flatnonzero(models != first_model)
+        if len(other_model) != 0:
+            keep[other_model[0]:] = False
+            ended = True
+            stop = starts[0, other_model[0]]
+    if 'label_alt_id' in field:
+        alternate_location = value('label_alt_id', 1)
+        keep &= (alternate_location == b'.') | (alternate_location == b'?') | (alternate_location == b'A')
+    starts, ends = starts[:, keep], ends[:, keep]
+    atoms = np.zeros(starts.shape[1], dtype=ATOM_DTYPE)
+    atoms['chain'] = first_of(('auth_asym_id', 'label_asym_id'), 4)
+    atoms['residue_name'] = value('label_comp_id', 5)
+    atoms['residue_number'] = first_of(('auth_seq_id', 'label_seq_id'), 8).astype(np.int32)
+    if 'pdbx_PDB_ins_code' in field:
+        insertion_code = value('pdbx_PDB_ins_code', 1)
+        insertion_code[(insertion_code == b'.') | (insertion_code == b'?')] = b''
+        atoms['insertion_code'] = insertion_code
+    atoms['atom_name'] = first_of(('auth_atom_id', 'label_atom_id'), 4)
+    atoms['element'] = upper(value('type_symbol', 2))
+    for k, name in enumerate(('Cartn_x', 'Cartn_y', 'Cartn_z')):
+        atoms['coordinates'][:, k] = value(name, 12).astype(np.float32)
+    return (atoms, first_model, ended, stop)
+
+
+# atoms of the first model in the _atom_site loop of an mmcif file, with the author chain ids pisa uses
+def read_mmcif(file_path, chunk_size=CHUNK_SIZE):
+    chunks = []
+    with open_structure_file(file_path) as f:
+        columns, first_line = read_atom_site_header(f)
+        if len(columns) == 0:
+            return (np.zeros(0, dtype=ATOM_DTYPE))
+        first_model = None
+        for buffer in read_chunks(f, chunk_size, head=first_line):
+            atoms, first_model, ended, stop = mmcif_atoms(buffer, columns, first_model)
+            chunks.append(atoms)
+            if ended:
+                break
+    return (np.concatenate(chunks + [np.zeros(0, dtype=ATOM_DTYPE)]))
+
+
+def is_mmcif(file_path):
+    name = file_path[:-3] if file_path.endswith('.gz') else file_path
+    return (os.path.splitext(name)[1].lower() in MMCIF_EXTENSIONS)
+
+
+# atoms of a pdb or mmcif structure file, picked by extension; .gz files are read compressed
+def read_structure(file_path):
+    if is_mmcif(file_path):
+        return (read_mmcif(file_path))
+    return (read_pdb(file_path))
+
+
+# rotation and translation of a symmetry operator written like '-x+1/2,y,-z', in fractional coordinates
+def parse_operator(text):
+    rotation = np.zeros((3, 3))
+    translation = np.zeros(3)
+    for row, expression in enumerate(text.lower().replace(' ', '').strip('\'"').split(',')):
+        for sign, term in re.findall(r'([+-]?)([xyz]|[0-9.]+(?:/[0-9.]+)?)', expression):
+            value = -1.0 if sign == '-' else 1.0
+            if term in ('x', 'y', 'z'):
+                rotation[row, 'xyz'.index(term)] += value
+            else:
+                translation[row] += value * float(Fraction(term))
+    return (rotation, translation)
+
+
+# the operator written back out, one expression per axis like pisa's x, y, z columns
+def format_operator(rotation, translation):
+    expressions = []
+    for row in range(3):
+        expression = ''
+        for k, axis in enumerate('xyz'):
+            if rotation[row, k] != 0:
+                expression += ('-' if rotation[row, k] < 0 else '+') + axis
+        shift = Fraction(translation[row]).limit_denominator(12)
+        if shift != 0:
+            expression += ('-' if shift < 0 else '+') + str(abs(shift))
+        expressions.append(expression.lstrip('+'))
+    return (expressions)
+
+
+class Crystal_Symmetry:
+    # unit cell (a, b, c in angstroms, alpha, beta, gamma in degrees) and the space group's operators in
+    # fractional coordinates; cartesian coordinates follow the pdb convention of a along x and b in the xy plane
+    def __init__(self, cell, space_group, operators):
+        self.cell = cell
+        self.space_group = space_group
+        self.operators = operators
+        a, b, c = cell[:3]
+        alpha, beta, gamma = np.radians(cell[3:])
+        volume = np.sqrt(1 - np.cos(alpha) ** 2 - np.cos(beta) ** 2 - np.cos(gamma) ** 2
+                         + 2 * np.cos(alpha) * np.cos(beta) * np.cos(gamma))
+        # columns are the cell edge vectors
+        self.orthogonalization = np.array([
+            [a, b * np.cos(gamma), c * np.cos(beta)],
+            [0, b * np.sin(gamma), c * (np.cos(alpha) - np.cos(beta) * np.cos(gamma)) / np.sin(gamma)],
+            [0, 0, c * volume / np.sin(gamma)]])
+        self.fractionalization = np.linalg.inv(self.orthogonalization)
+
+    # copies of the chains that some symmetry mate brings within cutoff of the atoms; mates are pruned by the
+    # bounding box of each transformed chain first, so only the chains that can touch are ever transformed.
+    # returns the copied atoms, the mate number of each copied atom (from 1), each mate's cartesian transform as a
+    # 3 x 4 matrix and its x, y, z and sym id
+    def symmetry_mates(self, atoms, cutoff):
+        coordinates = atoms['coordinates'].astype(np.float64)
+        chains, chain_index = np.unique(atoms['chain'], return_inverse=True)
+        low = coordinates.min(axis=0) - cutoff
+        high = coordinates.max(axis=0) + cutoff
+        # every operator with the lattice shifts that bring its copy of the structure back over it, give or take
+        # the structure's own extent in cells
+        extent = np.ceil(np.abs(self.fractionalization @ (high - low)).max()).astype(int)
+        steps = np.arange(-extent - 1, extent + 2)
+        shifts = np.array(list(itertools.product(steps, steps, steps)), dtype=np.float64)
+        centre = self.fractionalization @ ((low + high) / 2)
+        fractional_rotations = np.array([rotation for rotation, translation in self.operators])
+        fractional_translations = np.array([translation for rotation, translation in self.operators])
+        base = -np.round(fractional_rotations @ centre + fractional_translations - centre)
+        operator_numbers = np.repeat(np.arange(len(self.operators)), len(shifts))
+        lattice_shifts = (base[:, None, :] + shifts[None, :, :]).reshape(-1, 3)
+        rotations = (self.orthogonalization @ fractional_rotations @ self.fractionalization)[operator_numbers]
+        offsets = (fractional_translations[operator_numbers] + lattice_shifts) @ self.orthogonalization.T
+        # the identity without a shift is the structure itself
+        identity = np.all(np.isclose(fractional_rotations, np.eye(3)), axis=(1, 2)) & np.all(
+            np.isclose(fractional_translations, 0), axis=1)
+        itself = identity[operator_numbers] & np.all(lattice_shifts == 0, axis=1)
+        # bounding box corners of every chain, moved by every candidate mate
+        chain_low = np.array([coordinates[chain_index == k].min(axis=0) for k in range(len(chains))])
+        chain_high = np.array([coordinates[chain_index == k].max(axis=0) for k in range(len(chains))])
+        corners = np.array([np.where(corner, chain_high, chain_low)
+                            for corner in itertools.product((False, True), repeat=3)]).transpose(1, 0, 2)
+        moved = np.einsum('mij,ckj->mcki', rotations, corners) + offsets[:, None, None, :]
+        near = np.all((moved.min(axis=2) <= high) & (moved.max(axis=2) >= low), axis=2)
+        near[itself] = False
+        mate_numbers, mate_chains = np.nonzero(near)
+        # one batched affine transform over the atoms of every chain copy that survived the pruning
+        copies = [np.flatnonzero(chain_index == chain) for chain in mate_chains]
+        copy_atoms = np.concatenate(copies + [np.empty(0, dtype=np.int64)])
+        copy_mates = np.repeat(np.arange(len(copies)), [len(copy) for copy in copies])
+        mate_atoms = atoms[copy_atoms].copy()
+        mate_atoms['coordinates'] = np.einsum('aij,aj->ai', rotations[mate_numbers][copy_mates],
+                                              coordinates[copy_atoms]) + offsets[mate_numbers][copy_mates]
+        # chain copies made by the same mate share its number
+        used_mates, images = np.unique(mate_numbers[copy_mates], return_inverse=True)
+        transforms = np.concatenate([rotations[used_mates], offsets[used_mates][:, :, None]], axis=2)
+        descriptions = []
+        for mate in used_mates:
+            rotation, translation = self.operators[operator_numbers[mate]]
+            shift = lattice_shifts[mate].astype(int)
+            descriptions.append(format_operator(rotation, translation + shift)
+                                + ['{}_{}{}{}'.format(operator_numbers[mate] + 1, *(5 + shift))])
+        return (mate_atoms, images + 1, transforms, descriptions)
+
+
+# operators of a space group name from the built in table
+def space_group_operators(space_group):
+    name = ' '.join(space_group.upper().split())
+    name = SPACE_GROUP_ALIASES.get(name, name)
+    if name not in SPACE_GROUP_OPERATORS:
+        raise ValueError('No symmetry operators in the file and space group ' + space_group
+                         + ' is not in the built in table')
+    return ([parse_operator(operator) for operator in SPACE_GROUP_OPERATORS[name]])
+
+
+# unit cell and symmetry of a pdb file from CRYST1 and the REMARK 290 SMTRY operators, or None without CRYST1
+def read_pdb_crystal(file_path):
+    cell = None
+    space_group = ''
+    smtry = {}
+    with open_structure_file(file_path) as f:
+        for line in f:
+            line = line.decode('latin-1')
+            if line.startswith(('ATOM  ', 'HETATM', 'MODEL ')):
+                break
+            if line.startswith('CRYST1'):
+                cell = np.array([float(line[6:15]), float(line[15:24]), float(line[24:33]),
+                                 float(line[33:40]), float(line[40:47]), float(line[47:54])])
+                space_group = line[55:66].strip()
+            elif line.startswith('REMARK 290   SMTRY'):
+                fields = line.split()
+                smtry.setdefault(int(fields[3]), []).append([float(value) for value in fields[4:8]])
+    if cell is None:
+        return (None)
+    crystal = Crystal_Symmetry(cell, space_group, [])
+    if len(smtry) != 0:
+        # smtry operators are cartesian; in fractional coordinates their rotations are whole numbers
+        for number in sorted(smtry):
+            matrix = np.array(smtry[number])
+            rotation = np.round(crystal.fractionalization @ matrix[:, :3] @ crystal.orthogonalization)
+            crystal.operators.append((rotation, crystal.fractionalization @ matrix[:, 3]))
+    else:
+        crystal.operators = space_group_operators(space_group)
+    return (crystal)
+
+
+# unit cell and symmetry of an mmcif file from _cell, the space group name and its operator loop
+def read_mmcif_crystal(file_path):
+    items = {}
+    operators = []
+    # names of the loop being read, and whether its rows have started
+    loop_columns = None
+    loop_rows = False
+    with open_structure_file(file_path) as f:
+        for line in f:
+            line = line.decode('latin-1').strip()
+            if line.startswith('_atom_site.'):
+                break
+            if line.startswith(('loop_', '#', 'data_')):
+                loop_columns = [] if line.startswith('loop_') else None
+                loop_rows = False
+            elif line.startswith('_') and loop_columns is not None and not loop_rows:
+                loop_columns.append(line.split()[0])
+            elif line.startswith('_'):
+                loop_columns = None
+                fields = shlex.split(line)
+                items[fields[0]] = ' '.join(fields[1:])
+            elif loop_columns and line:
+                loop_rows = True
+                for name in ('_space_group_symop.operation_xyz', '_symmetry_equiv.pos_as_xyz'):
+                    if name in loop_columns:
+                        operators.append(parse_operator(shlex.split(line)[loop_columns.index(name)]))
+    if '_cell.length_a' not in items:
+        return (None)
+    cell = np.array([float(items['_cell.' + name]) for name in
+                     ('length_a', 'length_b', 'length_c', 'angle_alpha', 'angle_beta', 'angle_gamma')])
+    space_group = items.get('_symmetry.space_group_name_H-M', items.get('_space_group.name_H-M_alt', ''))
+    if len(operators) == 0:
+        operators = space_group_operators(space_group)
+    return (Crystal_Symmetry(cell, space_group, operators))
+
+
+def read_crystal(file_path):
+    if is_mmcif(file_path):
+        return (read_mmcif_crystal(file_path))
+    return (read_pdb_crystal(file_path))
@@ -0,0 +1,101 @@
+"""
+Benchmark of clean_interfaces_table on synthetic PISA interfaces tables of
+growing size, the way huge assemblies with tens of thousands of interfaces
+produce them: grouped interfaces under 'Average:' rows, group members
+missing their ID cell, and chain IDs longer than one letter.
+
+The row by row cleaning the edgelist builders used before is kept here as
+loop_clean_interfaces_table; up to --reference-limit rows it is timed too
+and its result checked against the vectorized one.
+
+Run from a terminal:
+    python LouiseNet_table_benchmark.py --rows 1000 4000 16000 64000 --reference-limit 16000
+"""
+
+import argparse
+import random
+import time
+from LouiseNet_tables import rows_to_frame, clean_interfaces_table
+
+
+# the cleaning block make_chain_edge_list, scrape_residual_interaction and make_residual_edgelist each had
+def loop_clean_interfaces_table(chain_only_df, single_letter_chains=True):
+    list_to_remove = []
+    list_to_move_right = []
+    for i in range(len(chain_only_df)):
+        if chain_only_df.iloc[i, 0] == 'Average:':
+            list_to_remove.append(i)
+    if (len(list_to_remove) != 0):
+        chain_only_df = chain_only_df.drop([0], axis=1)
+    for i in range(len(chain_only_df)):
+        if str(chain_only_df.iloc[i, 0]) == 'nan':
+            list_to_move_right.append(i)
+    for i in range(len(list_to_move_right)):
+        chain_only_df.iloc[list_to_move_right[i],
+                           :] = chain_only_df.iloc[list_to_move_right[i], :].shift(1)
+    if single_letter_chains:
+        for i in range(len(chain_only_df)):
+            if len(str(chain_only_df.iloc[i, 2])) != 1 or len(str(chain_only_df.iloc[i, 7])) != 1:
+                list_to_remove.append(i)
+    return (chain_only_df.drop(list_to_remove, axis=0))
+
+
+# rows of a pisa-shaped interfaces table with about row_count rows; every group_size-th interface starts a group
+# of interfaces averaged under an 'Average:' row, and long_chain_share of the chain ids have two letters
+def synthetic_interfaces_rows(row_count, group_size=4, long_chain_share=0.1, seed=0):
+    rng = random.Random(seed)
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'
+
+    def chain():
+        if rng.random() < long_chain_share:
+            return (rng.choice(letters) + rng.choice(letters))
+        return (rng.choice(letters))
+
+    def interface(interface_id):
+        return ([str(interface_id), '', chain(), str(rng.randint(20, 200)), str(rng.randint(5, 40)),
+                 str(round(rng.uniform(5000, 30000), 1)), '', chain(), str(rng.randint(20, 200)), '',
+                 str(rng.randint(5, 40)), str(round(rng.uniform(200, 2000), 1)), str(round(rng.uniform(-20, 5), 1)),
+                 str(round(rng.uniform(0, 1), 3)), str(rng.randint(0, 20)), str(rng.randint(0, 10)), '0',
+                 str(round(rng.uniform(0, 1), 3))])
+
+    rows = []
+    interface_id = 1
+    while len(rows) < row_count:
+        group = rng.randint(2, group_size) if interface_id % group_size == 0 else 1
+        rows.append([str(interface_id)] + interface(interface_id))
+        # the other members of a group lack the id cell, so their cells start one column early
+        for member in range(1, group):
+            rows.append([''] + interface(interface_id + member)[1:])
+        if group > 1:
+            rows.append(['Average:', '', '', '', '', str(round(rng.uniform(5000, 30000), 1))])
+        interface_id += group
+    return (rows)
+
+
+def benchmark(row_counts, reference_limit, repeats=3):
+    for row_count in row_counts:
+        frame = rows_to_frame(synthetic_interfaces_rows(row_count))
+        start = time.perf_counter()
+        for repeat in range(repeats):
+            cleaned = clean_interfaces_table(frame)
+        vectorized = (time.perf_counter() - start) / repeats
+        line = '{:>7} rows  vectorized {:8.4f} s  {:6.2f} us/row'.format(
+            len(frame), vectorized, 1e6 * vectorized / len(frame))
+        if len(frame) <= reference_limit:
+            start = time.perf_counter()
+            reference = loop_clean_interfaces_table(frame.copy())
+            loop = time.perf_counter() - start
+            same = cleaned.to_csv(index=False) == reference.to_csv(index=False)
+            line += '  loop {:8.3f} s  {:6.1f}x  {}'.format(loop, loop / vectorized,
+                                                            'same' if same else 'DIFFERENT')
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time clean_interfaces_table on large interfaces tables.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 4000, 16000, 64000],
+                        help='sizes of the synthetic interfaces tables')
+    parser.add_argument('--reference-limit', type=int, default=16000,
+                        help='largest table the row by row cleaning is timed and compared on')
+    args = parser.parse_args()
+    benchmark(args.rows, args.reference_limit)
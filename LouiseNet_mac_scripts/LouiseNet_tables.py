@@ -0,0 +1,78 @@
+from lxml import etree, html
+import numpy as np
+import pandas as pd
+
+# compiled once and reused for every page; pisa marks the interfaces table and the residue tables by class
+INTERFACES_TABLE_XPATH = etree.XPath('//table[@class="data-table tborder"]')
+DETAIL_TABLES_XPATH = etree.XPath('//table[@class="standard"]')
+ROWS_XPATH = etree.XPath('.//tr')
+CELLS_XPATH = etree.XPath('.//td')
+# cells pandas.read_csv reads as missing, kept so the frames match what the csv round trip produced
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+             '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+
+# cell texts of every row in a table
+def table_rows(table):
+    rows = []
+    for row in ROWS_XPATH(table):
+        cells = [data.text_content().replace(u'\xa0', u'') for data in CELLS_XPATH(row)]
+        # rows that would be blank lines in a csv file
+        if len(cells) > 1 or (len(cells) == 1 and cells[0] != ''):
+            rows.append(cells)
+    return (rows)
+
+
+# rows of the interfaces table on the pisa interfaces page
+def extract_interfaces_rows(page_source):
+    tables = INTERFACES_TABLE_XPATH(html.fromstring(page_source))
+    return (table_rows(tables[0]))
+
+
+# rows of the left and right residue tables on a pisa interface details page
+def extract_detail_rows(page_source):
+    tables = DETAIL_TABLES_XPATH(html.fromstring(page_source))
+    return (table_rows(tables[len(tables) - 3]), table_rows(tables[len(tables) - 2]))
+
+
+# typed frame with the same columns, missing values and dtypes pandas.read_csv(header=None) gives for the rows
+def rows_to_frame(rows):
+    width = max((len(row) for row in rows), default=0)
+    columns = {}
+    for j in range(width):
+        column = np.array([row[j] if j < len(row) and row[j] not in NA_VALUES else np.nan
+                           for row in rows], dtype=object)
+        try:
+            columns[j] = pd.to_numeric(column)
+        except (ValueError, TypeError):
+            columns[j] = column
+    return (pd.DataFrame(columns))
+
+
+# writes the rows as the comma separated file the rest of the pipeline reads
+def write_rows(file_name, rows):
+    with open(file_name, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(','.join(row) for row in rows))
+
+
+# the interfaces table cleaned the way every edgelist reads it: when pisa grouped interfaces under 'Average:'
+# rows, the leading group column and those rows go, and the rows whose first cell is then missing are moved one
+# cell right; with single_letter_chains, rows whose chain ids aren't single letters go too
+def clean_interfaces_table(frame, single_letter_chains=True):
+    removed = (frame.iloc[:, 0] == 'Average:').to_numpy()
+    if removed.any():
+        frame = frame.drop([0], axis=1)
+    moved = (frame.iloc[:, 0].astype(str) == 'nan').to_numpy()
+    if moved.any():
+        values = frame.iloc[moved, :-1].to_numpy(dtype=object)
+        numeric = frame.columns[(frame.dtypes != object).to_numpy()]
+        frame = frame.copy()
+        frame.iloc[moved, 0] = np.nan
+        for j in range(1, len(frame.columns)):
+            frame.iloc[moved, j] = values[:, j - 1]
+        # numeric columns that were only given numbers stay numeric
+        frame[numeric] = frame[numeric].infer_objects()
+    if single_letter_chains:
+        removed |= (frame.iloc[:, 2].astype(str).str.len() != 1).to_numpy()
+        removed |= (frame.iloc[:, 7].astype(str).str.len() != 1).to_numpy()
+    return (frame[~removed])
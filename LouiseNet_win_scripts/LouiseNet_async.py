@@ -0,0 +1,70 @@
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
+from LouiseNet_http import PISA_HTTP_Client, PISA_Rate_Limiter
+
+
+class PISA_Async_Runner:
+    # runs the pisa stage of many structures at once within the service's budget: at most requests_per_second
+    # requests and max_jobs structures in flight; jobs are polled with asyncio sleeps instead of a waiting thread each
+    def __init__(self, requests_per_second=2.0, max_jobs=4, poll_interval=5, timeout=300):
+        self.rate_limiter = PISA_Rate_Limiter(requests_per_second)
+        self.max_jobs = max_jobs
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        # a thread is only held while a request or a stage runs, which happens inside a job slot
+        self.executor = ThreadPoolExecutor(max_workers=max_jobs)
+        self.job_slots = None
+
+    async def in_thread(self, function, *args):
+        return (await asyncio.get_running_loop().run_in_executor(self.executor, function, *args))
+
+    # submits the structure and waits for its interfaces page without holding a thread
+    async def submit_structure(self, client):
+        response = await self.in_thread(client.start_job)
+        deadline = time.monotonic() + self.timeout
+        while not client.job_done(response):
+            if time.monotonic() > deadline:
+                raise TimeoutError('PISA did not finish ' + client.pdb_file_path)
+            await asyncio.sleep(self.poll_interval)
+            response = await self.in_thread(client.poll_job, response)
+        client.interfaces_response = response
+
+    # runs one PISA_Protein stage, e.g. 'make_residual_edgelist', over a rate limited http client
+    async def run_protein(self, pisa, stage):
+        async with self.job_slots:
+            own_client = pisa.page_source is None
+            if own_client:
+                pisa.page_source = PISA_HTTP_Client(pisa.pdb_file_path, pisa_url=pisa.pisa_url,
+                                                    timeout=self.timeout, poll_interval=self.poll_interval,
+                                                    pool_size=max(1, pisa.detail_workers),
+                                                    rate_limiter=self.rate_limiter)
+            try:
+                # structures whose interfaces and wanted residue tables are all cached don't need a job at all;
+                # any other one, including one missing only residue tables, is submitted and polled here, so the
+                # stage never waits on pisa from inside its thread
+                if not pisa.page_source.offline and await self.in_thread(pisa.needs_pisa_job, stage):
+                    await self.submit_structure(pisa.page_source)
+                return (await self.in_thread(getattr(pisa, stage)))
+            finally:
+                if own_client:
+                    pisa.page_source.close()
+                    pisa.page_source = None
+
+    async def run_all(self, proteins, stage):
+        self.job_slots = asyncio.Semaphore(self.max_jobs)
+        return (await asyncio.gather(*(self.run_protein(pisa, stage) for pisa in proteins),
+                                     return_exceptions=True))
+
+    # runs the stage for every PISA_Protein; returns each stage result, or the exception it failed with, in order
+    def run(self, proteins, stage='make_residual_edgelist'):
+        return (asyncio.run(self.run_all(proteins, stage)))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return (self)
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
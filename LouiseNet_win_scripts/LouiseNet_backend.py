@@ -1,94 +1,362 @@
-from bs4 import BeautifulSoup as bs
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 import shutil
 import os
+import queue
 import re
+from LouiseNet_cache import hash_file, result_key, PISA_Checkpoint
+from LouiseNet_browser import PISA_URL, start_chrome
+from LouiseNet_tables import extract_interfaces_rows, extract_detail_rows, rows_to_frame, write_rows, \
+    clean_interfaces_table
+from LouiseNet_replay import INTERFACES_PAGE, DETAILS_PAGE, save_page
+from LouiseNet_trajectory import read_frames, trajectory_contacts, Contact_Persistence
+from LouiseNet_structure import read_structure, read_crystal
+from LouiseNet_interface import chain_interfaces, interfaces_rows, chain_contacts, residue_contacts, residue_labels, \
+    interface_bonds, chain_bonds, incremental_chain_interfaces, approximate_chain_interfaces, VDW_RADII, \
+    PROBE_RADIUS
 
 
 class PISA_Protein:
-    def __init__(self, protein_name, pdb_file_path, mapping_file_path, chrome_driver_path, wanted_protein_letter, edge_list):
+    def __init__(self, protein_name, pdb_file_path, mapping_file_path, chrome_driver_path, wanted_protein_letter, edge_list, cache=None, driver_pool=None, headless=False, detail_workers=1, page_source=None, record_dir=None, pisa_url=PISA_URL, resume=False, structure_cache=None, interface_cache=None):
         self.protein_name = protein_name
         self.pdb_file_path = pdb_file_path
         self.mapping_file_path = mapping_file_path
         self.chrome_driver_path = chrome_driver_path
         self.main_interaction_file_name = protein_name + '_main_interaction.csv'
         self.detail_interaction_file_name = protein_name + '_detail_interaction.csv'
+        self.checkpoint_file_name = protein_name + '_checkpoint.jsonl'
         self.wanted_protein_letter = wanted_protein_letter
         self.edge_list = edge_list
+        # optional PISA_Cache; results are keyed by the hash of the structure file bytes
+        self.cache = cache
+        self.pdb_file_hash = None
+        # optional PISA_Driver_Pool shared between structures; without one each run starts its own browser
+        self.driver_pool = driver_pool
+        # headless runs a display-less browser that skips images, stylesheets and trackers
+        self.headless = headless
+        # number of browser sessions that fetch interface detail pages at the same time
+        self.detail_workers = detail_workers
+        # optional source of pisa pages used instead of a browser: a PISA_Replay of saved pages, or a
+        # PISA_HTTP_Client that talks to pisa without one; record_dir saves the pages fetched from pisa
+        self.page_source = page_source
+        self.record_dir = record_dir
+        # address of the pisa service, e.g. a local PISA_Stand_In_Server for benchmarking
+        self.pisa_url = pisa_url
+        # resume picks up the interface details a crashed run on the same structure file already fetched
+        self.resume = resume
+        # optional Structure_Cache of parsed structure files for the local interface computations
+        self.structure_cache = structure_cache
+        # optional Interface_Cache of chain surfaces and chain pair interfaces; with it compute_chain_interaction
+        # only recomputes the chains that changed since an earlier run
+        self.interface_cache = interface_cache
+        self.atoms = None
+        self.driver = None
+        self.interfaces_rows = None
 
-    # starts chrome driver
+    # starts chrome driver; with a pool, timeout is how long to wait for one of its sessions before queue.Empty
 
-    def start_driver(self):
-        url = 'https://www.ebi.ac.uk/pdbe/pisa/'
-        driver = webdriver.Chrome(self.chrome_driver_path)
-        driver.get(url)
+    def start_driver(self, timeout=None):
+        if self.driver_pool is not None:
+            return (self.driver_pool.acquire(timeout))
+        driver = start_chrome(self.chrome_driver_path, self.headless)
+        driver.get(self.pisa_url)
         return (driver)
 
-    # scrapes pisa chain interactions
-    def scrape_chain_interaction(self):
+    # hands a browser back to the pool, or quits it when it was started for this run only
+    def release_driver(self, driver):
+        if self.driver_pool is not None:
+            self.driver_pool.release(driver)
+        else:
+            driver.quit()
+
+    def stop_driver(self):
+        if self.driver is None:
+            return
+        self.release_driver(self.driver)
+        self.driver = None
+        self.interfaces_rows = None
+
+    def structure_hash(self):
+        if self.pdb_file_hash is None:
+            self.pdb_file_hash = hash_file(self.pdb_file_path)
+        return (self.pdb_file_hash)
+
+    # results scraped from pisa are keyed by the structure file and the pisa_url they came from
+    def pisa_result_key(self):
+        return (result_key(self.structure_hash(), self.pisa_url))
+
+    # looks up a previously scraped result for this structure file
+    def cache_get(self, result_type):
+        if self.cache is None:
+            return None
+        return self.cache.get(self.pisa_result_key(), result_type)
+
+    # cache_get without counting a hit or a miss
+    def cache_peek(self, result_type):
+        if self.cache is None:
+            return None
+        return self.cache.peek(self.pisa_result_key(), result_type)
+
+    def cache_put(self, result_type, value):
+        if self.cache is not None:
+            self.cache.put(self.pisa_result_key(), result_type, value)
+
+    # whether running stage, e.g. 'make_residual_edgelist', has to submit the structure to pisa: the pisa stages
+    # do when the interfaces or one of the wanted interfaces' residue tables isn't cached
+    def needs_pisa_job(self, stage):
+        if stage not in ('scrape_chain_interaction', 'scrape_residual_interaction', 'make_residual_edgelist'):
+            return (False)
+        interfaces_rows = self.cache_peek('interfaces')
+        if interfaces_rows is None:
+            return (True)
+        if stage == 'scrape_chain_interaction':
+            return (False)
+        chain_and_residual_df = clean_interfaces_table(rows_to_frame(interfaces_rows), single_letter_chains=False)
+        ids_left, ids_right = self.matched_interface_ids(chain_and_residual_df)
+        return (any(self.cache_peek('details_{}'.format(i)) is None for i in ids_left + ids_right))
+
+    # uploads the structure file to pisa and waits for the interfaces page
+    def submit_structure(self):
         driver = self.start_driver()
-        launch_pisa_button = driver.find_element_by_xpath(
-            '//*[@id="pdbeSubmitButton"]/span/button')
-        driver.execute_script("arguments[0].click();", launch_pisa_button)
-        # upload pdb file /html/body/div[2]/div[2]/div/form/table/tbody/tr[4]/td/u/input
-        coordinate_file_button = driver.find_element_by_css_selector("input[type='radio'][value='id_coorfile']")
-        driver.execute_script("arguments[0].click();", coordinate_file_button)
-        # upload pdb file
-        driver.find_element_by_xpath(
-            '//*[@id="sform"]/tbody/tr[3]/td/b/input[2]').send_keys(self.pdb_file_path)
-        upload_button = driver.find_element_by_xpath(
-            '//*[@id="sform"]/tbody/tr[3]/td/b/input[3]')
-        driver.execute_script("arguments[0].click();", upload_button)
-        # get interfaces
-        interfaces_button = driver.find_element_by_xpath(
-            '//*[@id="pdbeSubmitButton"]/span/button')
-        driver.execute_script("arguments[0].click();", interfaces_button)
-        # waiting for page to load to interfaces page
-        wait = WebDriverWait(driver, 300)
-        wait.until(EC.presence_of_element_located(
-            (By.XPATH, '//button[contains(text(), "Interfaces")]')))
-        # save content into bs and taking out data table
-        content = driver.page_source
-        soup = bs(content, "html.parser")
-        table = soup.find('table', {'class': 'data-table tborder'})
-        saved_pdb = ""
-        for row in table.find_all('tr'):
-            pdb = ""
-            for data in row.find_all('td'):
-                pdb = pdb + "," + data.text.replace(u'\xa0', u'')
-            saved_pdb = saved_pdb + "\n" + pdb[1:]
-            # writing csv
-        with open(self.main_interaction_file_name, 'w', encoding='utf-8') as f:
-            f.write(saved_pdb)
+        self.driver = driver
+        try:
+            launch_pisa_button = driver.find_element_by_xpath(
+                '//*[@id="pdbeSubmitButton"]/span/button')
+            driver.execute_script("arguments[0].click();", launch_pisa_button)
+            # upload pdb file /html/body/div[2]/div[2]/div/form/table/tbody/tr[4]/td/u/input
+            coordinate_file_button = driver.find_element_by_css_selector("input[type='radio'][value='id_coorfile']")
+            driver.execute_script("arguments[0].click();", coordinate_file_button)
+            # upload pdb file
+            driver.find_element_by_xpath(
+                '//*[@id="sform"]/tbody/tr[3]/td/b/input[2]').send_keys(self.pdb_file_path)
+            upload_button = driver.find_element_by_xpath(
+                '//*[@id="sform"]/tbody/tr[3]/td/b/input[3]')
+            driver.execute_script("arguments[0].click();", upload_button)
+            # get interfaces
+            interfaces_button = driver.find_element_by_xpath(
+                '//*[@id="pdbeSubmitButton"]/span/button')
+            driver.execute_script("arguments[0].click();", interfaces_button)
+            # waiting for page to load to interfaces page
+            wait = WebDriverWait(driver, 300)
+            wait.until(EC.presence_of_element_located(
+                (By.XPATH, '//button[contains(text(), "Interfaces")]')))
+        except Exception:
+            # don't leave a half-submitted browser behind
+            self.stop_driver()
+            raise
         return (driver)
 
+    # scrapes pisa chain interactions; keep_driver leaves the browser on the interfaces page for residue scraping
+    def scrape_chain_interaction(self, keep_driver=False):
+        if self.page_source is not None and self.page_source.offline:
+            interfaces_rows = extract_interfaces_rows(self.page_source.interfaces_page())
+        else:
+            interfaces_rows = self.cache_get('interfaces')
+        if interfaces_rows is None:
+            if self.page_source is not None:
+                content = self.page_source.interfaces_page()
+            else:
+                driver = self.submit_structure()
+                content = driver.page_source
+                if not keep_driver:
+                    self.stop_driver()
+            if self.record_dir is not None:
+                save_page(self.record_dir, INTERFACES_PAGE, content)
+            interfaces_rows = extract_interfaces_rows(content)
+            self.cache_put('interfaces', interfaces_rows)
+        # writing csv
+        write_rows(self.main_interaction_file_name, interfaces_rows)
+        self.interfaces_rows = interfaces_rows
+        return (self.driver)
+
+    # atoms of the structure file, parsed once and kept in the structure cache when there is one
+    def read_atoms(self):
+        if self.atoms is None and self.structure_cache is not None:
+            self.atoms = self.structure_cache.get(self.structure_hash())
+        if self.atoms is None:
+            self.atoms = read_structure(self.pdb_file_path)
+            if self.structure_cache is not None:
+                self.structure_cache.put(self.structure_hash(), 'atoms', self.atoms)
+        return (self.atoms)
+
+    # computes the interfaces table from the structure file's coordinates instead of asking pisa, hydrogen bond,
+    # salt bridge and disulfide counts included; with crystal_contacts the symmetry copies from the file's unit
+    # cell and space group are included too. workers above 1 spreads the surface computation over processes.
+    # only interfaces larger than min_area square angstroms are kept. approximate computes them on one sphere per
+    # residue, calibrated on the few interfaces closest to min_area computed at atom level, and writes each
+    # interface's estimated error to the _interface_errors file; those whose area is within its error of min_area are
+    # computed at atom level, so it only saves time on the interfaces far from min_area
+    def compute_chain_interaction(self, n_points=100, crystal_contacts=False, workers=1, approximate=False,
+                                  min_area=0.0):
+        atoms = self.read_atoms()
+        mates = None
+        if crystal_contacts:
+            if approximate:
+                raise ValueError('Crystal contacts are not computed approximately')
+            crystal = read_crystal(self.pdb_file_path)
+            if crystal is None:
+                raise ValueError('No unit cell in ' + self.pdb_file_path)
+            # atoms further apart than two of the largest probe inflated radii cannot bury each other
+            mates = crystal.symmetry_mates(atoms, 2 * (max(VDW_RADII.values()) + PROBE_RADIUS))
+        if approximate:
+            interfaces = approximate_chain_interfaces(atoms, min_area=min_area, accurate_points=n_points,
+                                                      workers=workers)
+        elif self.interface_cache is not None and mates is None:
+            interfaces = incremental_chain_interfaces(atoms, self.interface_cache, n_points=n_points, workers=workers)
+        else:
+            interfaces = chain_interfaces(atoms, n_points=n_points, mates=mates, workers=workers)
+        interfaces = interfaces[interfaces['interface_area'] > min_area].reset_index(drop=True)
+        if approximate:
+            errors = interfaces[['chain_1', 'chain_2', 'interface_area', 'interface_area_error']]
+            errors.columns = ['Chain 1', 'Chain 2', 'Interface Area', 'Estimated Error']
+            errors.to_csv(self.protein_name + '_interface_errors.csv', header=True, index=None,
+                          float_format='%.1f')
+        interfaces = interfaces.merge(chain_bonds(interface_bonds(atoms)), on=['chain_1', 'chain_2'], how='left')
+        interfaces = interfaces.fillna({'hydrogen_bonds': 0, 'salt_bridges': 0, 'disulfides': 0,
+                                        'hydrogen_bond_residues': '', 'salt_bridge_residues': '',
+                                        'disulfide_residues': ''})
+        if crystal_contacts:
+            # bonds are only counted between the chains themselves, not with their copies
+            interfaces.loc[interfaces['symmetry_id'] != '1_555', ['hydrogen_bonds', 'salt_bridges', 'disulfides']] = \
+                np.nan
+        self.interfaces_rows = interfaces_rows(interfaces)
+        write_rows(self.main_interaction_file_name, self.interfaces_rows)
+        return (interfaces)
+
+    # the scraped interfaces table as a frame, read back from the main interaction file if it wasn't scraped in this run
+    def read_main_interaction(self):
+        if self.interfaces_rows is not None:
+            return (rows_to_frame(self.interfaces_rows))
+        return (pd.read_csv(self.main_interaction_file_name, header=None))
+
+    # scrapes the left and right residue tables of one interface with a browser on the interfaces page
+    def scrape_interface_detail(self, driver, interface_id):
+        select_button = driver.find_element_by_xpath(
+            "//input[@name='radio_interface' and @value={}]".format(interface_id))
+        details_button = driver.find_element_by_xpath(
+            '//button[contains(text(), "Details")]')
+        driver.execute_script("arguments[0].click();", select_button)
+        driver.execute_script("arguments[0].click();", details_button)
+        content = driver.page_source
+        if self.record_dir is not None:
+            save_page(self.record_dir, DETAILS_PAGE.format(interface_id), content)
+        detail_rows_left, detail_rows_right = extract_detail_rows(content)
+        return_button = driver.find_element_by_xpath(
+            '//button[contains(text(), "Interfaces")]')
+        driver.execute_script("arguments[0].click();", return_button)
+        return (detail_rows_left, detail_rows_right)
+
+    # scrapes the residue tables of several interfaces, submitting the structure only if some aren't cached
+    def scrape_interface_details(self, interface_ids):
+        if self.page_source is not None and self.page_source.offline:
+            return ({i: extract_detail_rows(self.page_source.details_page(i)) for i in interface_ids})
+        saved_details = {}
+        missing_ids = []
+        # every fetched interface is written to the checkpoint right away, so a crash loses at most one page
+        checkpoint = PISA_Checkpoint(self.checkpoint_file_name, self.pisa_result_key(), self.resume)
+        try:
+            for i in interface_ids:
+                if i in checkpoint.details:
+                    saved_details[i] = (checkpoint.details[i][0], checkpoint.details[i][1])
+                    continue
+                cached_details = self.cache_get('details_{}'.format(i))
+                if cached_details is not None:
+                    saved_details[i] = (cached_details[0], cached_details[1])
+                else:
+                    missing_ids.append(i)
+            if len(missing_ids) != 0:
+                workers = min(self.detail_workers, len(missing_ids))
+                if self.page_source is not None:
+                    fetched_details = self.download_interface_details(missing_ids, workers)
+                else:
+                    if self.driver is None:
+                        self.submit_structure()
+                    if self.driver_pool is not None:
+                        workers = min(workers, self.driver_pool.size)
+                    if workers > 1:
+                        fetched_details = self.harvest_interface_details(missing_ids, workers)
+                    else:
+                        fetched_details = ((i, self.scrape_interface_detail(self.driver, i))
+                                           for i in missing_ids)
+                for i, details in fetched_details:
+                    checkpoint.add(i, list(details))
+                    self.cache_put('details_{}'.format(i), list(details))
+                    saved_details[i] = details
+        except BaseException:
+            checkpoint.close()
+            raise
+        checkpoint.remove()
+        # results come back in interface order whatever order they were fetched in
+        return ({i: saved_details[i] for i in interface_ids})
+
+    # fetches interface details from the page source, several pages at a time over its shared session
+    def download_interface_details(self, interface_ids, workers):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pages = executor.map(self.page_source.details_page, interface_ids)
+            for i, content in zip(interface_ids, pages):
+                if self.record_dir is not None:
+                    save_page(self.record_dir, DETAILS_PAGE.format(i), content)
+                yield (i, extract_detail_rows(content))
+
+    # fetches interface details with several browser sessions; the extra sessions join this run's pisa job
+    # through its cookies and interfaces page, and every session takes the next interface from a shared queue
+    def harvest_interface_details(self, interface_ids, workers):
+        interfaces_url = self.driver.current_url
+        cookies = self.driver.get_cookies()
+        pending_ids = queue.Queue()
+        for i in interface_ids:
+            pending_ids.put(i)
+        fetched_details = queue.Queue()
+
+        def harvest(driver):
+            joined_job = driver is None
+            try:
+                if joined_job:
+                    # extra sessions are only taken when the pool has one to spare right away; waiting could
+                    # deadlock runs that each hold a session and wait for another's
+                    try:
+                        driver = self.start_driver(timeout=0)
+                    except queue.Empty:
+                        return
+                    for cookie in cookies:
+                        driver.add_cookie(cookie)
+                    driver.get(interfaces_url)
+                while True:
+                    try:
+                        i = pending_ids.get_nowait()
+                    except queue.Empty:
+                        return
+                    fetched_details.put((i, self.scrape_interface_detail(driver, i)))
+            except Exception as e:
+                fetched_details.put((None, e))
+            finally:
+                if joined_job and driver is not None:
+                    self.release_driver(driver)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            executor.submit(harvest, self.driver)
+            for _ in range(workers - 1):
+                executor.submit(harvest, None)
+            for _ in range(len(interface_ids)):
+                i, details = fetched_details.get()
+                if i is None:
+                    # stop the other sessions from picking up more work before failing
+                    try:
+                        while True:
+                            pending_ids.get_nowait()
+                    except queue.Empty:
+                        pass
+                    raise details
+                yield (i, details)
+
     # making letter edge list for chains alone
     def make_chain_edge_list(self):
-        chain_only_df = pd.read_csv(
-            self.main_interaction_file_name, header=None)
-        # clean PISA_df
-        list_to_remove = []
-        list_to_move_right = []
-        for i in range(len(chain_only_df)):
-            if chain_only_df.iloc[i, 0] == 'Average:':
-                list_to_remove.append(i)
-        if (len(list_to_remove) != 0):
-            chain_only_df = chain_only_df.drop([0], axis=1)
-        for i in range(len(chain_only_df)):
-            if str(chain_only_df.iloc[i, 0]) == 'nan':
-                list_to_move_right.append(i)
-        for i in range(len(list_to_move_right)):
-            chain_only_df.iloc[list_to_move_right[i],
-                               :] = chain_only_df.iloc[list_to_move_right[i], :].shift(1)
-        for i in range(len(chain_only_df)):
-            if len(str(chain_only_df.iloc[i, 2])) != 1 or len(str(chain_only_df.iloc[i, 7])) != 1:
-                list_to_remove.append(i)
-        chain_only_df = chain_only_df.drop(list_to_remove, axis=0)
+        chain_only_df = self.read_main_interaction()
+        chain_only_df = clean_interfaces_table(chain_only_df)
         if len(chain_only_df.columns) == 22:
             chain_only_df.columns = ['ID', '', 'Chain 1', 'Number of Interfacing Atoms',
                             'Number of Interfacing Residues', 'Surface Area', 'Unnamed: 6',
@@ -143,28 +411,80 @@ class PISA_Protein:
             edgelist_numeric_df.to_csv(
                 self.protein_name + '_edgelist_nodeID.csv', header=None, index=None)
 
-    # checking for matched residual in main interaction page and scrape detail interaction of residuals
-    def scrape_residual_interaction(self):
-        driver = self.scrape_chain_interaction()
-        chain_and_residual_df = pd.read_csv(
-            self.main_interaction_file_name, header=None)
-        # clean PISA_df
-        list_to_remove = []
-        list_to_move_right = []
-        for i in range(len(chain_and_residual_df)):
-            if chain_and_residual_df.iloc[i, 0] == 'Average:':
-                list_to_remove.append(i)
-        if (len(list_to_remove) != 0):
-            chain_and_residual_df = chain_and_residual_df.drop([0], axis=1)
-        for i in range(len(chain_and_residual_df)):
-            if str(chain_and_residual_df.iloc[i, 0]) == 'nan':
-                list_to_move_right.append(i)
-        for i in range(len(list_to_move_right)):
-            chain_and_residual_df.iloc[list_to_move_right[i],
-                                       :] = chain_and_residual_df.iloc[list_to_move_right[i], :].shift(1)
-        chain_and_residual_df = chain_and_residual_df.drop(
-            list_to_remove, axis=0)
-        # finding matched ids: ids_left: matched ids on left col; ids_right: matched ids on right col
+    # the mapping file with node numbers, as the chain edgelists write it
+    def write_chain_mapping(self):
+        mapping_df = pd.read_csv(self.mapping_file_path, header=None)
+        mapping_df[2] = (range(1, len(mapping_df) + 1))
+        mapping_df.columns = ['Chain Name', 'Chain ID', 'Node ID']
+        mapping_df.to_csv(self.protein_name + '_mapping.csv',
+                          header=True, index=None)
+        return (mapping_df)
+
+    # one node per residue label, named by its chain's name and residue as make_residual_edgelist names them
+    def write_residue_mapping(self, labels):
+        mapping_df = pd.read_csv(self.mapping_file_path, header=None)
+        chain_names = dict(zip(mapping_df.iloc[:, 1].astype(str), mapping_df.iloc[:, 0]))
+        label_chains = pd.Series(labels, dtype=object).str.split(':', n=1)
+        mapping_df = pd.DataFrame({0: label_chains.str[0].map(chain_names).fillna(label_chains.str[0])
+                                   + label_chains.str[1], 1: labels})
+        mapping_df['number'] = (range(1, len(mapping_df) + 1))
+        mapping_df.to_csv(self.protein_name + '_mapping.csv',
+                          header=None, index=None)
+        return (mapping_df)
+
+    # chain edge lists straight from the structure file: two chains are linked when any of their atoms are within
+    # cutoff angstroms, and the number of such atom pairs is written as a third, weight column
+    def make_chain_contact_edge_list(self, cutoff=4.0):
+        contacts = chain_contacts(self.read_atoms(), cutoff)
+        mapping_df = self.write_chain_mapping()
+        chain_ids = mapping_df['Chain ID'].astype(str)
+        if self.edge_list == 'letter':
+            contacts.to_csv(self.protein_name + '_edgelist_chainID.csv', header=None, index=None)
+        elif self.edge_list == 'name':
+            # chains missing from the mapping file keep their letter, as in make_chain_edge_list
+            names = dict(zip(chain_ids, mapping_df['Chain Name']))
+            edgelist_name_df = pd.DataFrame({0: contacts['chain_1'].map(names).fillna(contacts['chain_1']),
+                                             1: contacts['chain_2'].map(names).fillna(contacts['chain_2']),
+                                             2: contacts['contacts']})
+            edgelist_name_df.to_csv(
+                self.protein_name + '_edgelist_chainName.csv', header=None, index=None)
+        elif self.edge_list == 'number':
+            numbers = dict(zip(chain_ids, mapping_df['Node ID']))
+            edgelist_numeric_df = pd.DataFrame({0: contacts['chain_1'].map(numbers).fillna(contacts['chain_1']),
+                                                1: contacts['chain_2'].map(numbers).fillna(contacts['chain_2']),
+                                                2: contacts['contacts']})
+            edgelist_numeric_df.to_csv(
+                self.protein_name + '_edgelist_nodeID.csv', header=None, index=None)
+        return (contacts)
+
+    # chains linked by hydrogen bonds, salt bridges or disulfides in the structure file, with the count of each
+    # kind and the residue pairs behind them as edge attributes: chain 1, chain 2, hydrogen bonds, salt bridges,
+    # disulfides, then the three residue pair lists; every bond is also written to the _bonds.csv file
+    def make_chain_bond_edge_list(self, hydrogen_bond_cutoff=3.5, salt_bridge_cutoff=4.0, disulfide_cutoff=2.5):
+        bonds = interface_bonds(self.read_atoms(), hydrogen_bond_cutoff, salt_bridge_cutoff, disulfide_cutoff)
+        bonds.to_csv(self.protein_name + '_bonds.csv', header=True, index=None)
+        edges = chain_bonds(bonds)
+        mapping_df = self.write_chain_mapping()
+        chain_ids = mapping_df['Chain ID'].astype(str)
+        if self.edge_list == 'letter':
+            edges.to_csv(self.protein_name + '_edgelist_chainID_with_bonds.csv', header=None, index=None)
+        elif self.edge_list == 'name':
+            names = dict(zip(chain_ids, mapping_df['Chain Name']))
+            edgelist_name_df = edges.assign(chain_1=edges['chain_1'].map(names).fillna(edges['chain_1']),
+                                            chain_2=edges['chain_2'].map(names).fillna(edges['chain_2']))
+            edgelist_name_df.to_csv(
+                self.protein_name + '_edgelist_chainName_with_bonds.csv', header=None, index=None)
+        elif self.edge_list == 'number':
+            numbers = dict(zip(chain_ids, mapping_df['Node ID']))
+            edgelist_numeric_df = edges.assign(chain_1=edges['chain_1'].map(numbers).fillna(edges['chain_1']),
+                                               chain_2=edges['chain_2'].map(numbers).fillna(edges['chain_2']))
+            edgelist_numeric_df.to_csv(
+                self.protein_name + '_edgelist_nodeID_with_bonds.csv', header=None, index=None)
+        return (edges)
+
+    # finding matched ids of the cleaned interfaces table: ids_left: matched ids on left col; ids_right: matched ids
+    # on right col
+    def matched_interface_ids(self, chain_and_residual_df):
         ids_left = []
         ids_right = []
         for i in range(len(chain_and_residual_df)):
@@ -173,149 +493,59 @@ class PISA_Protein:
                                            0] = chain_and_residual_df.iloc[i - 1, 0] + 1
             if (str(chain_and_residual_df.iloc[i, 2]) == self.wanted_protein_letter) and (
                     len(chain_and_residual_df.iloc[i, 7]) == 1):
-                ids_left.append(chain_and_residual_df.iloc[i, 0] - 1)
+                ids_left.append(int(chain_and_residual_df.iloc[i, 0]) - 1)
             if (str(chain_and_residual_df.iloc[i, 7]) == self.wanted_protein_letter) and (
                     len(chain_and_residual_df.iloc[i, 2]) == 1):
-                ids_right.append(chain_and_residual_df.iloc[i, 0] - 1)
+                ids_right.append(int(chain_and_residual_df.iloc[i, 0]) - 1)
+        return (ids_left, ids_right)
 
-        # creating used elements for the loop
-        details_button = driver.find_element_by_xpath(
-            '/html/body/div[2]/div[2]/div/form/table[2]/tbody/tr[1]/td/span[3]/span/button')
-        wanted_details = pd.DataFrame()
-        # looping through matched(on the left) rows and scrapping the details
-        for i in ids_left:
-            select_button = driver.find_element_by_xpath(
-                "//input[@name='radio_interface' and @value={}]".format(i))
-            details_button = driver.find_element_by_xpath(
-                '//button[contains(text(), "Details")]')
-            driver.execute_script("arguments[0].click();", select_button)
-            driver.execute_script("arguments[0].click();", details_button)
-            content = driver.page_source
-            soup = bs(content, "html.parser")
-            tables = soup.find_all('table', {'class': 'standard'})
-            table_left = tables[len(tables) - 3]
-            table_right = tables[len(tables) - 2]
-            # finding left table
-            saved_detail_left = ""
-            for row in table_left.find_all('tr'):
-                detail_left = ""
-                for data in row.find_all('td'):
-                    detail_left = detail_left + "," + \
-                        data.text.replace(u'\xa0', u'')
-                saved_detail_left = saved_detail_left + "\n" + detail_left[1:]
-                # finding right table
-            saved_detail_right = ""
-            for row in table_right.find_all('tr'):
-                detail_right = ""
-                for data in row.find_all('td'):
-                    detail_right = detail_right + "," + \
-                        data.text.replace(u'\xa0', u'')
-                saved_detail_right = saved_detail_right + \
-                    "\n" + detail_right[1:]
-            df_left = pd.read_csv(
-                StringIO(saved_detail_left), sep=',', header=None)
-            df_right = pd.read_csv(
-                StringIO(saved_detail_right), sep=',', header=None)
-            # saving nonezero interactions into wanted_details
-            for j in range(len(df_left) - 1):
-                if df_left.iloc[j, 4] != '  0.00':
-                    wanted_details = wanted_details.append(df_left.iloc[j, :])
-            for k in range(len(df_right) - 1):
-                if df_right.iloc[k, 4] != '  0.00':
-                    wanted_details = wanted_details.append(df_right.iloc[k, :])
-            return_button = driver.find_element_by_xpath(
-                '//button[contains(text(), "Interfaces")]')
-            driver.execute_script("arguments[0].click();", return_button)
-        # looping through matched(on the right) rows and scrapping the details
-        for i in ids_right:
-            select_button = driver.find_element_by_xpath(
-                "//input[@name='radio_interface' and @value={}]".format(i))
-            details_button = driver.find_element_by_xpath(
-                '//button[contains(text(), "Details")]')
-            driver.execute_script("arguments[0].click();", select_button)
-            driver.execute_script("arguments[0].click();", details_button)
-            content = driver.page_source
-            soup = bs(content, "html.parser")
-            tables = soup.find_all('table', {'class': 'standard'})
-            table_left = tables[len(tables) - 3]
-            table_right = tables[len(tables) - 2]
-            # finding left table
-            saved_detail_left = ""
-            for row in table_left.find_all('tr'):
-                detail_left = ""
-                for data in row.find_all('td'):
-                    detail_left = detail_left + "," + \
-                        data.text.replace(u'\xa0', u'')
-                saved_detail_left = saved_detail_left + "\n" + detail_left[1:]
-                # finding right table
-            saved_detail_right = ""
-            for row in table_right.find_all('tr'):
-                detail_right = ""
-                for data in row.find_all('td'):
-                    detail_right = detail_right + "," + \
-                        data.text.replace(u'\xa0', u'')
-                saved_detail_right = saved_detail_right + \
-                    "\n" + detail_right[1:]
-            df_left = pd.read_csv(
-                StringIO(saved_detail_left), sep=',', header=None)
-            df_right = pd.read_csv(
-                StringIO(saved_detail_right), sep=',', header=None)
-            # saving nonezero interactions into wanted_details
-            for j in range(len(df_right) - 1):
-                if df_right.iloc[j, 4] != '  0.00':
-                    wanted_details = wanted_details.append(df_right.iloc[j, :])
-            for k in range(len(df_left) - 1):
-                if df_left.iloc[k, 4] != '  0.00':
-                    wanted_details = wanted_details.append(df_left.iloc[k, :])
-            return_button = driver.find_element_by_xpath(
-                '//button[contains(text(), "Interfaces")]')
-            driver.execute_script("arguments[0].click();", return_button)
-        wanted_details = wanted_details.iloc[::-1]
-        wanted_details = wanted_details.rename(
-            columns={0: "id", 1: "structure", 2: "HSDC", 3: "ASA", 4: "BSA", 5: "G"})
-        wanted_details = wanted_details.drop(['id'], axis=1)
-        final_index = []
-        for i in range(len(wanted_details)):
-            if wanted_details.iloc[i, 0][:1] == self.wanted_protein_letter:
-                final_index.append(i)
-            # creat the final csv with wanted format
-        detail_interaction = [[0] * 2] * len(final_index)
-        detail_interaction = pd.DataFrame.from_records(detail_interaction)
-        detail_interaction.iloc[0, 0] = wanted_details.iloc[0, 0][:1]
-        for i in range(len(final_index)):
-            detail_interaction.iloc[i,
-                                    1] = wanted_details.iloc[final_index[i], 0]
-        for i in range(1, len(detail_interaction)):
-            if final_index[i] - final_index[i - 1] == 1:
-                detail_interaction.iloc[i,
-                                        0] = detail_interaction.iloc[i - 1, 0]
-            else:
-                detail_interaction.iloc[i,
-                                        0] = wanted_details.iloc[final_index[i] - 1, 0][:1]
+    # checking for matched residual in main interaction page and scrape detail interaction of residuals
+    def scrape_residual_interaction(self):
+        self.scrape_chain_interaction(keep_driver=True)
+        try:
+            chain_and_residual_df = self.read_main_interaction()
+            chain_and_residual_df = clean_interfaces_table(chain_and_residual_df, single_letter_chains=False)
+            ids_left, ids_right = self.matched_interface_ids(chain_and_residual_df)
+            # visiting each matched interface once, even when the wanted chain is on both sides
+            detail_tables = {}
+            interface_details = self.scrape_interface_details(
+                list(dict.fromkeys(ids_left + ids_right)))
+            for i, (detail_rows_left, detail_rows_right) in interface_details.items():
+                detail_tables[i] = (rows_to_frame(detail_rows_left), rows_to_frame(detail_rows_right))
+        finally:
+            self.stop_driver()
+        # residue names of the nonzero interactions, gathered per table and joined once;
+        # matched(on the left) rows take the left table first, matched(on the right) rows the right one
+        structure_chunks = []
+        for table_order, ids in ((0, ids_left), (1, ids_right)):
+            for i in ids:
+                detail_frames = detail_tables[i]
+                for detail_df in (detail_frames[table_order], detail_frames[1 - table_order]):
+                    # the last row of a residue table is its summary line
+                    nonzero = detail_df.iloc[:-1, 4] != '  0.00'
+                    structure_chunks.append(detail_df.iloc[:-1, 1][nonzero].to_numpy(dtype=object))
+        structures = np.concatenate(
+            [np.empty(0, dtype=object)] + structure_chunks)[::-1]
+        structure_chains = pd.Series(structures, dtype=object).str[:1].to_numpy(dtype=object)
+        final_index = np.flatnonzero(structure_chains == self.wanted_protein_letter)
+        if len(final_index) == 0:
+            return (pd.DataFrame(columns=[0, 1]))
+        # creat the final csv with wanted format: each residue of the wanted chain is paired with the chain
+        # listed just before its run of consecutive wanted-chain residues
+        run_starts = np.ones(len(final_index), dtype=bool)
+        run_starts[1:] = np.diff(final_index) != 1
+        partner_chains = structure_chains[np.maximum(final_index - 1, 0)]
+        partner_chains[0] = structure_chains[0]
+        run_start_positions = np.maximum.accumulate(
+            np.where(run_starts, np.arange(len(final_index)), 0))
+        detail_interaction = pd.DataFrame({0: partner_chains[run_start_positions],
+                                           1: structures[final_index]})
         return (detail_interaction)
 
     def make_residual_edgelist(self):
         detail_interaction_df = self.scrape_residual_interaction()
-        chain_and_residual_df = pd.read_csv(
-            self.main_interaction_file_name, header=None)
-        list_to_remove = []
-        list_to_move_right = []
-        for i in range(len(chain_and_residual_df)):
-            if chain_and_residual_df.iloc[i, 0] == 'Average:':
-                list_to_remove.append(i)
-        if (len(list_to_remove) != 0):
-            chain_and_residual_df = chain_and_residual_df.drop([0], axis=1)
-        for i in range(len(chain_and_residual_df)):
-            if str(chain_and_residual_df.iloc[i, 0]) == 'nan':
-                list_to_move_right.append(i)
-        for i in range(len(list_to_move_right)):
-            chain_and_residual_df.iloc[list_to_move_right[i],
-                                       :] = chain_and_residual_df.iloc[list_to_move_right[i], :].shift(1)
-        for i in range(len(chain_and_residual_df)):
-            if len(str(chain_and_residual_df.iloc[i, 2])) != 1 or len(str(chain_and_residual_df.iloc[i, 7])) != 1:
-                list_to_remove.append(i)
-        chain_and_residual_df = chain_and_residual_df.drop(
-            list_to_remove, axis=0)
+        chain_and_residual_df = self.read_main_interaction()
+        chain_and_residual_df = clean_interfaces_table(chain_and_residual_df)
         chain_and_residual_df.to_csv(
             self.main_interaction_file_name, header=None, index=None)
         # list 1,2 = main interaction; list 3,4 = detail interactions
@@ -346,9 +576,10 @@ class PISA_Protein:
         for i in range(len(mapping_df)):
             if mapping_df.iloc[i, 1] == self.wanted_protein_letter:
                 wanted_chain_name = mapping_df.iloc[i, 0]
-        for i in range(len(unique_2)):
-            mapping_df = mapping_df.append(
-                {0: wanted_chain_name + unique_2[i].split(':')[1], 1: unique_2[i]}, ignore_index=True)
+        # one node per residue of the wanted chain, added in a single concat
+        residue_mapping_df = pd.DataFrame({0: [wanted_chain_name + residue.split(':')[1] for residue in unique_2],
+                                           1: unique_2})
+        mapping_df = pd.concat([mapping_df, residue_mapping_df], ignore_index=True)
         list_to_remove = []
         for i in range(len(mapping_df)):
             if mapping_df.iloc[i, 1] == self.wanted_protein_letter:
@@ -385,6 +616,70 @@ class PISA_Protein:
             edgelist_numeric_df.to_csv(
                 self.protein_name + '_edgelist_nodeID_with_detail.csv', header=None, index=None)
 
+    # residue network of the whole assembly from the structure file: every residue of every chain is a node, and
+    # residues with atoms within cutoff are linked, weighted by the number of such atom pairs; written in
+    # make_residual_edgelist's files, with a third, weight column. workers above 1 spreads the search of large
+    # assemblies over processes
+    def make_residual_contact_edgelist(self, cutoff=4.0, between_chains_only=False, workers=1):
+        atoms = self.read_atoms()
+        contacts = residue_contacts(atoms, cutoff, between_chains_only=between_chains_only, workers=workers)
+        labels = residue_labels(atoms)[1]
+        mapping_df = self.write_residue_mapping(labels)
+        if self.edge_list == 'letter':
+            contacts.to_csv(
+                self.protein_name + '_edgelist_chainID_with_detail.csv', header=None, index=None)
+        elif self.edge_list == 'name':
+            names = dict(zip(mapping_df[1], mapping_df[0]))
+            edgelist_name_df = pd.DataFrame({0: contacts['residue_1'].map(names),
+                                             1: contacts['residue_2'].map(names),
+                                             2: contacts['contacts']})
+            edgelist_name_df.to_csv(
+                self.protein_name + '_edgelist_chainName_with_detail.csv', header=None, index=None)
+        elif self.edge_list == 'number':
+            numbers = dict(zip(mapping_df[1], mapping_df['number']))
+            edgelist_numeric_df = pd.DataFrame({0: contacts['residue_1'].map(numbers),
+                                                1: contacts['residue_2'].map(numbers),
+                                                2: contacts['contacts']})
+            edgelist_numeric_df.to_csv(
+                self.protein_name + '_edgelist_nodeID_with_detail.csv', header=None, index=None)
+        return (contacts)
+
+    # contact network of every model of the structure file, or of every frame of a dcd trajectory over it, at
+    # the chain or residue level: each frame's edges go to _frames.csv (frame, node 1, node 2, contacts) and the
+    # fraction of frames each edge is present in to _persistence.csv. frames are read one at a time and spread
+    # over workers processes
+    def make_trajectory_edgelist(self, trajectory_path=None, level='chain', cutoff=4.0, workers=1):
+        if level == 'residue':
+            mapping_df = self.write_residue_mapping(residue_labels(self.read_atoms())[1])
+            ids, names, numbers = mapping_df[1], mapping_df[0], mapping_df['number']
+            file_name = '_with_detail'
+        else:
+            mapping_df = self.write_chain_mapping()
+            ids, names, numbers = mapping_df['Chain ID'].astype(str), mapping_df['Chain Name'], mapping_df['Node ID']
+            file_name = ''
+        if self.edge_list == 'letter':
+            file_name = self.protein_name + '_edgelist_chainID' + file_name
+            nodes = None
+        elif self.edge_list == 'name':
+            file_name = self.protein_name + '_edgelist_chainName' + file_name
+            nodes = dict(zip(ids, names))
+        elif self.edge_list == 'number':
+            file_name = self.protein_name + '_edgelist_nodeID' + file_name
+            nodes = dict(zip(ids, numbers))
+        frames = read_frames(trajectory_path or self.pdb_file_path, topology_path=self.pdb_file_path)
+        persistence = Contact_Persistence()
+        with open(file_name + '_frames.csv', 'w', newline='') as frames_file:
+            for frame, contacts in enumerate(trajectory_contacts(frames, level, cutoff, workers)):
+                if nodes is not None:
+                    contacts = contacts.assign(node_1=contacts['node_1'].map(nodes).fillna(contacts['node_1']),
+                                               node_2=contacts['node_2'].map(nodes).fillna(contacts['node_2']))
+                persistence.add(contacts)
+                contacts.insert(0, 'frame', frame + 1)
+                contacts.to_csv(frames_file, header=None, index=None)
+        weights = persistence.weights()
+        weights.to_csv(file_name + '_persistence.csv', header=None, index=None)
+        return (weights)
+
     def organize_file(self, current_directory):
         final_directory = os.path.join(current_directory, self.protein_name)
         if os.path.exists(final_directory):
@@ -0,0 +1,253 @@
+"""
+Local stand-in for the PISA web service, used to benchmark the scraping
+path end to end without the real service.
+
+Pages are served from fixtures in the PISA_Replay layout (interfaces.html
+and details_<id>.html). A fixture directory either holds one such set,
+served for every upload, or one sub directory per structure, picked by the
+name of the uploaded file without its extension. Recorded pages
+(PISA_Protein(record_dir=...)) and pages from write_fixture_pages both work.
+
+Run from a terminal:
+    python LouiseNet_pisa_server.py fixture_dir --port 8000 --latency 0.05 --job-latency 2
+and point PISA_Protein(pisa_url='http://localhost:8000/') at it.
+"""
+
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from lxml import etree, html
+from urllib.parse import urlparse, parse_qs
+import argparse
+import itertools
+import os
+import random
+import threading
+import time
+from LouiseNet_replay import INTERFACES_PAGE, DETAILS_PAGE, PISA_Replay
+
+SESSION_COOKIE = 'pisa_session'
+PAGE_TEMPLATE = '<!DOCTYPE html><html><head><title>PISA stand-in</title></head><body><div><div><div>{}</div></div></div></body></html>'
+LANDING_PAGE = PAGE_TEMPLATE.format(
+    '<form method="get" action="/pisa/launch">'
+    '<div id="pdbeSubmitButton"><span><button type="submit">Launch PISA</button></span></div>'
+    '</form>')
+LAUNCH_PAGE = PAGE_TEMPLATE.format(
+    '<form method="post" action="/pisa/launch" enctype="multipart/form-data">'
+    '<table id="sform"><tbody>'
+    '<tr><td><input type="radio" name="source" value="id_pdbcode">PDB code</td></tr>'
+    '<tr><td><input type="radio" name="source" value="id_coorfile">Coordinate file</td></tr>'
+    '<tr><td><b><input type="hidden" name="MAX_FILE_SIZE" value="0">'
+    '<input type="file" name="coordinate_file">'
+    '<input type="submit" name="upload" value="Upload"></b></td></tr>'
+    '<tr><td>{}</td></tr>'
+    '</tbody></table>'
+    '<div id="pdbeSubmitButton"><span><button type="submit" name="submit" value="1">Submit</button></span></div>'
+    '</form>')
+INTERFACES_TEMPLATE = PAGE_TEMPLATE.format(
+    '<form method="get" action="/pisa/details">{}'
+    '<table><tbody><tr><td><span></span><span></span>'
+    '<span><span><button type="submit">Details</button></span></span>'
+    '<span><span><button type="button" onclick="window.location=\'/pisa/interfaces\'">Interfaces</button></span></span>'
+    '</td></tr></tbody></table></form>')
+DETAILS_TEMPLATE = PAGE_TEMPLATE.format(
+    '<form method="get" action="/pisa/interfaces">'
+    '<button type="submit">Interfaces</button>{}</form>')
+
+
+# tables of a saved page embedded in the stand-in's own controls, so recorded pages need no live links
+def embed_tables(page_source, table_class, template):
+    tables = html.fromstring(page_source).xpath('//table[@class="{}"]'.format(table_class))
+    return (template.format(''.join(etree.tostring(table, encoding='unicode', method='html')
+                                    for table in tables)))
+
+
+# uploaded file name from a multipart form body, or None when the form had no file
+def uploaded_file_name(content_type, body):
+    message = BytesParser(policy=HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body)
+    for part in message.iter_parts():
+        if part.get_filename():
+            return (part.get_filename())
+    return (None)
+
+
+class PISA_Stand_In_Server:
+    # latency is added to every page, job_latency once per submitted structure
+    def __init__(self, fixture_dir, host='localhost', port=0, latency=0.0, job_latency=0.0):
+        self.fixture_dir = fixture_dir
+        self.latency = latency
+        self.job_latency = job_latency
+        self.sessions = {}
+        self.session_ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return ('http://{}:{}/'.format(host, port))
+
+    # fixtures for an uploaded structure file
+    def replay_for(self, structure_name):
+        if os.path.isfile(os.path.join(self.fixture_dir, INTERFACES_PAGE)):
+            return (PISA_Replay(self.fixture_dir))
+        structure_dir = os.path.join(
+            self.fixture_dir, os.path.splitext(os.path.basename(structure_name))[0])
+        return (PISA_Replay(structure_dir))
+
+    def handler_class(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def session(self):
+                cookie = SimpleCookie(self.headers.get('Cookie', ''))
+                if SESSION_COOKIE in cookie and cookie[SESSION_COOKIE].value in stand_in.sessions:
+                    return (cookie[SESSION_COOKIE].value, stand_in.sessions[cookie[SESSION_COOKIE].value])
+                with stand_in.lock:
+                    session_id = str(next(stand_in.session_ids))
+                    stand_in.sessions[session_id] = {}
+                return (session_id, stand_in.sessions[session_id])
+
+            def respond(self, page, session_id=None, status=200):
+                time.sleep(stand_in.latency)
+                content = page.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(content)))
+                if session_id is not None:
+                    self.send_header('Set-Cookie', '{}={}; Path=/'.format(SESSION_COOKIE, session_id))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def redirect(self, location):
+                self.send_response(303)
+                self.send_header('Location', location)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def do_GET(self):
+                session_id, session = self.session()
+                url = urlparse(self.path)
+                try:
+                    if url.path in ('/', '/pdbe/pisa/'):
+                        self.respond(LANDING_PAGE, session_id)
+                    elif url.path == '/pisa/launch':
+                        self.respond(LAUNCH_PAGE.format(''), session_id)
+                    elif url.path == '/pisa/interfaces':
+                        replay = stand_in.replay_for(session['structure'])
+                        self.respond(embed_tables(replay.interfaces_page(), 'data-table tborder',
+                                                  INTERFACES_TEMPLATE), session_id)
+                    elif url.path == '/pisa/details':
+                        interface_id = parse_qs(url.query)['radio_interface'][0]
+                        replay = stand_in.replay_for(session['structure'])
+                        self.respond(embed_tables(replay.details_page(interface_id), 'standard',
+                                                  DETAILS_TEMPLATE), session_id)
+                    else:
+                        self.respond(PAGE_TEMPLATE.format('Not found'), session_id, 404)
+                except (KeyError, OSError):
+                    self.respond(PAGE_TEMPLATE.format('No such job or page'), session_id, 404)
+
+            def do_POST(self):
+                session_id, session = self.session()
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                structure_name = uploaded_file_name(self.headers.get('Content-Type', ''), body)
+                if structure_name is not None:
+                    session['structure'] = structure_name
+                if 'structure' not in session:
+                    self.respond(LAUNCH_PAGE.format('No coordinate file uploaded'), session_id)
+                elif structure_name is not None:
+                    self.respond(LAUNCH_PAGE.format('Uploaded ' + structure_name), session_id)
+                else:
+                    # the submitted job "runs" before its interfaces page is ready
+                    time.sleep(stand_in.job_latency)
+                    self.redirect('/pisa/interfaces')
+
+        return (Handler)
+
+    # serves in a background thread so benchmarks can drive it from the same process
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return (self)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return (self.start())
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+# writes a synthetic, pisa-shaped fixture set where every pair of chains shares an interface
+def write_fixture_pages(fixture_dir, chain_ids='ABCDEFGH', residues_per_side=6, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(fixture_dir, exist_ok=True)
+    residue_names = ['ALA', 'ARG', 'ASN', 'ASP', 'GLU', 'GLN', 'LYS', 'LEU', 'SER', 'TYR']
+    rows = []
+    details = []
+    for chain_1, chain_2 in itertools.combinations(chain_ids, 2):
+        interface_id = len(rows)
+        area = round(rng.uniform(200, 2000), 1)
+        rows.append(['<input type="radio" name="radio_interface" value="{}">{}'.format(interface_id, interface_id + 1),
+                     '', chain_1, str(rng.randint(20, 200)), str(rng.randint(5, 40)),
+                     str(round(rng.uniform(5000, 30000), 1)), '', chain_2,
+                     str(rng.randint(20, 200)), '', str(rng.randint(5, 40)), str(area),
+                     str(round(rng.uniform(-20, 5), 1)), str(round(rng.uniform(0, 1), 3)),
+                     str(rng.randint(0, 20)), str(rng.randint(0, 10)), '0',
+                     str(round(rng.uniform(0, 1), 3))])
+        sides = []
+        for chain in (chain_1, chain_2):
+            side = [[str(k + 1), '{}:{} {}'.format(chain, rng.choice(residue_names), rng.randint(1, 500)),
+                     rng.choice(['', 'H', 'S', 'HS']), '{:.2f}'.format(rng.uniform(0, 150)),
+                     '{:.2f}'.format(rng.choice([0, rng.uniform(1, 100)])), '{:.2f}'.format(rng.uniform(-1, 1))]
+                    for k in range(residues_per_side)]
+            side.append(['', 'Total', '', '', '', ''])
+            sides.append(side)
+        details.append(sides)
+
+    def table(table_class, table_rows):
+        return ('<table class="{}"><tr><th>header</th></tr>{}</table>'.format(
+            table_class, ''.join('<tr>' + ''.join('<td>{}</td>'.format(cell) for cell in row) + '</tr>'
+                                 for row in table_rows)))
+
+    with open(os.path.join(fixture_dir, INTERFACES_PAGE), 'w', encoding='utf-8') as f:
+        f.write(PAGE_TEMPLATE.format(table('data-table tborder', rows)))
+    for interface_id, (left, right) in enumerate(details):
+        with open(os.path.join(fixture_dir, DETAILS_PAGE.format(interface_id)), 'w', encoding='utf-8') as f:
+            f.write(PAGE_TEMPLATE.format(table('standard', [['summary']]) + table('standard', left)
+                                         + table('standard', right) + table('standard', [['legend']])))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve PISA-shaped pages from fixtures.')
+    parser.add_argument('fixture_dir')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='seconds added to every page')
+    parser.add_argument('--job-latency', type=float, default=0.0,
+                        help='seconds a submitted structure takes to finish')
+    parser.add_argument('--write-fixtures', metavar='CHAIN_IDS',
+                        help='first write synthetic fixtures with these chain IDs into fixture_dir')
+    args = parser.parse_args()
+    if args.write_fixtures:
+        write_fixture_pages(args.fixture_dir, chain_ids=args.write_fixtures)
+    server = PISA_Stand_In_Server(args.fixture_dir, host=args.host, port=args.port,
+                                  latency=args.latency, job_latency=args.job_latency)
+    print('Serving PISA stand-in at ' + server.url)
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.server.server_close()
@@ -0,0 +1,58 @@
+import os
+import tarfile
+import zipfile
+
+# file names of the saved pages; details pages are numbered by the radio button value of their interface
+INTERFACES_PAGE = 'interfaces.html'
+DETAILS_PAGE = 'details_{}.html'
+
+
+# saves a pisa page so the run can be replayed later without a browser
+def save_page(record_dir, page_name, page_source):
+    os.makedirs(record_dir, exist_ok=True)
+    with open(os.path.join(record_dir, page_name), 'w', encoding='utf-8') as f:
+        f.write(page_source)
+
+
+class PISA_Replay:
+    # saved pages need neither the cache nor a checkpoint
+    offline = True
+
+    # replay_path is a directory of saved pages or a .zip/.tar(.gz) archive of one
+    def __init__(self, replay_path):
+        self.replay_path = replay_path
+        self.archived_pages = None
+        if os.path.isdir(replay_path):
+            return
+        # archives of one structure's pages are small, so they are read in full; nested folders are ignored
+        self.archived_pages = {}
+        if zipfile.is_zipfile(replay_path):
+            with zipfile.ZipFile(replay_path) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir():
+                        self.archived_pages[os.path.basename(member.filename)] = \
+                            archive.read(member).decode('utf-8')
+        elif tarfile.is_tarfile(replay_path):
+            with tarfile.open(replay_path) as archive:
+                for member in archive.getmembers():
+                    if member.isfile():
+                        self.archived_pages[os.path.basename(member.name)] = \
+                            archive.extractfile(member).read().decode('utf-8')
+        else:
+            raise ValueError(
+                'Replay path must be a directory or a .zip/.tar archive: ' + replay_path)
+
+    def read_page(self, page_name):
+        if self.archived_pages is not None:
+            if page_name not in self.archived_pages:
+                raise FileNotFoundError(
+                    page_name + ' is not in ' + self.replay_path)
+            return (self.archived_pages[page_name])
+        with open(os.path.join(self.replay_path, page_name), 'r', encoding='utf-8') as f:
+            return (f.read())
+
+    def interfaces_page(self):
+        return (self.read_page(INTERFACES_PAGE))
+
+    def details_page(self, interface_id):
+        return (self.read_page(DETAILS_PAGE.format(interface_id)))
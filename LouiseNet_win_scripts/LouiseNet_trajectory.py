@@ -0,0 +1,172 @@
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import io
+import itertools
+import numpy as np
+import pandas as pd
+import struct
+from LouiseNet_structure import CHUNK_SIZE, open_structure_file, read_chunks, pdb_atoms, \
+    read_atom_site_header, mmcif_atoms, is_mmcif, read_structure
+from LouiseNet_interface import chain_contacts, residue_contacts
+
+
+# atoms of every model of a pdb file, one model at a time; a file without MODEL records is one model
+def pdb_frames(file_path, chunk_size=CHUNK_SIZE):
+    model = []
+    with open_structure_file(file_path) as f:
+        for buffer in read_chunks(f, chunk_size):
+            while True:
+                if buffer.startswith(b'ENDMDL'):
+                    model_end = 0
+                else:
+                    model_end = buffer.find(b'\nENDMDL') + 1
+                    if model_end == 0:
+                        break
+                cut = buffer.find(b'\n', model_end) + 1
+                model.append(pdb_atoms(buffer[:cut])[0])
+                yield (np.concatenate(model))
+                model = []
+                buffer = buffer[cut:]
+            # a chunk can end right after a model
+            if buffer:
+                model.append(pdb_atoms(buffer)[0])
+    if sum(len(atoms) for atoms in model) != 0:
+        yield (np.concatenate(model))
+
+
+# the models of one _atom_site loop, one at a time; returns what was read past the end of the loop, or None
+# when the file ended with it
+def mmcif_loop_frames(f, columns, head, chunk_size=CHUNK_SIZE):
+    model = []
+    first_model = None
+    buffer = head
+    while True:
+        data = f.read(chunk_size)
+        buffer += data
+        if not data and buffer and not buffer.endswith(b'\n'):
+            buffer += b'\n'
+        cut = buffer.rfind(b'\n') + 1
+        rows, buffer = buffer[:cut], buffer[cut:]
+        while rows:
+            atoms, first_model, ended, stop = mmcif_atoms(rows, columns, first_model)
+            model.append(atoms)
+            if not ended:
+                break
+            yield (np.concatenate(model))
+            model = []
+            first_model = None
+            rows = rows[stop:]
+            # the model ended with the loop itself unless another model's rows follow
+            if rows[:1] in (b'#', b'_') or rows[:5] in (b'loop_', b'data_'):
+                return (rows + buffer)
+        if not data:
+            if sum(len(atoms) for atoms in model) != 0:
+                yield (np.concatenate(model))
+            return (None)
+
+
+# atoms of every model of an mmcif file, one model at a time: each model number of an _atom_site loop, and each
+# data block with a loop of its own
+def mmcif_frames(file_path, chunk_size=CHUNK_SIZE):
+    with open_structure_file(file_path) as f:
+        rest = b''
+        while rest is not None:
+            # what was read past the end of the last loop is looked through again for the next one, its last line
+            # finished first so no line is split between it and the file
+            if rest and not rest.endswith(b'\n'):
+                rest += f.readline()
+            pending = io.BytesIO(rest)
+            columns, first_line = read_atom_site_header(itertools.chain(pending, f))
+            if len(columns) == 0:
+                return
+            rest = yield from mmcif_loop_frames(f, columns, first_line + pending.read(), chunk_size)
+
+
+# coordinates of every frame of a charmm/namd dcd trajectory, one frame at a time
+def dcd_frames(file_path):
+    with open(file_path, 'rb') as f:
+        endian = '<' if struct.unpack('<i', f.read(4))[0] == 84 else '>'
+        header = f.read(84)
+        if header[:4] != b'CORD':
+            raise ValueError(file_path + ' is not a DCD trajectory')
+        control = struct.unpack(endian + '20i', header[4:])
+        frames, fixed_atoms, unit_cell = control[0], control[8], control[10]
+        if fixed_atoms != 0:
+            raise ValueError('DCD trajectories with fixed atoms are not supported')
+        f.read(4)
+        title_size = struct.unpack(endian + 'i', f.read(4))[0]
+        f.read(title_size + 4)
+        f.read(4)
+        atom_count = struct.unpack(endian + 'i', f.read(4))[0]
+        f.read(4)
+        # each axis is one fortran record: its size, the values, its size again
+        record = np.dtype([('head', endian + 'i4'), ('values', endian + 'f4', (atom_count,)), ('tail', endian + 'i4')])
+        for frame in range(frames):
+            if unit_cell:
+                f.read(56)
+            axes = np.fromfile(f, dtype=record, count=3)
+            if len(axes) < 3:
+                return
+            yield (np.ascontiguousarray(axes['values'].T))
+
+
+# atoms of every frame of a multi model pdb or mmcif file, or of a dcd trajectory over a topology structure
+def read_frames(file_path, topology_path=None):
+    if file_path.lower().endswith('.dcd'):
+        topology = read_structure(topology_path)
+        for coordinates in dcd_frames(file_path):
+            if len(coordinates) != len(topology):
+                raise ValueError('The trajectory has {} atoms and the topology {}'.format(
+                    len(coordinates), len(topology)))
+            atoms = topology.copy()
+            atoms['coordinates'] = coordinates
+            yield (atoms)
+    elif is_mmcif(file_path):
+        yield from mmcif_frames(file_path)
+    else:
+        yield from pdb_frames(file_path)
+
+
+# the contact network of one frame: chain or residue pairs with atoms within cutoff, and how many atom pairs
+def frame_contacts(atoms, level='chain', cutoff=4.0):
+    if level == 'residue':
+        contacts = residue_contacts(atoms, cutoff)
+    else:
+        contacts = chain_contacts(atoms, cutoff)
+    contacts.columns = ['node_1', 'node_2', 'contacts']
+    return (contacts)
+
+
+# the contact network of every frame, in order; frames are read as the workers take them, so no more than two
+# per worker are held at once
+def trajectory_contacts(frames, level='chain', cutoff=4.0, workers=1):
+    if workers <= 1:
+        for atoms in frames:
+            yield (frame_contacts(atoms, level, cutoff))
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = deque()
+        for atoms in frames:
+            running.append(executor.submit(frame_contacts, atoms, level, cutoff))
+            if len(running) >= 2 * workers:
+                yield (running.popleft().result())
+        while running:
+            yield (running.popleft().result())
+
+
+class Contact_Persistence:
+    # the fraction of frames each edge is present in, kept as running frame counts so no frame is held
+    def __init__(self):
+        self.frame_count = 0
+        self.edge_frames = pd.Series(0, index=pd.MultiIndex.from_arrays([[], []], names=['node_1', 'node_2']))
+
+    def add(self, contacts):
+        self.frame_count += 1
+        present = pd.Series(1, index=pd.MultiIndex.from_arrays([contacts['node_1'], contacts['node_2']],
+                                                                names=['node_1', 'node_2']))
+        self.edge_frames = self.edge_frames.add(present, fill_value=0)
+
+    def weights(self):
+        persistence = (self.edge_frames / max(self.frame_count, 1)).rename('persistence')
+        return (persistence.reset_index().sort_values('persistence', ascending=False, kind='stable')
+                .reset_index(drop=True))
@@ -9,6 +9,8 @@ import sys
 # Other Modules
 from PIL import ImageTk, Image
 from LouiseNet_backend import *
+from LouiseNet_cache import PISA_Cache
+from LouiseNet_browser import PISA_Driver_Pool
 import networkx as nx
 import matplotlib.pyplot as plt
 import pandas as pd
@@ -103,10 +105,16 @@ class MainWindow(tk.Tk):
         self.pdbFilePath_var = tk.StringVar(value='')
         self.csvFilePath_var = tk.StringVar(value='')
         self.chrFilePath_var = tk.StringVar(value='')
+        # Browser Options
+        self.headless_var = tk.BooleanVar(value=False)
         # Protein Info
         self.proteinName_var = tk.StringVar(value='')
         self.wantedProteinId_var = tk.StringVar(value='')
         self.layout_type = tk.StringVar(value='circular')
+        # Scraped PISA results reused across runs on the same structure file
+        self.pisa_cache = PISA_Cache()
+        # Browser kept warm between runs, created for the selected chromedriver
+        self.driver_pool = None
 
         # --Widgets--
         self.create_widgets()
@@ -115,6 +123,7 @@ class MainWindow(tk.Tk):
 
         # --Other Options--
         self.iconphoto(True, self.icon_img)  # Set icon image
+        self.protocol('WM_DELETE_WINDOW', self.close)
         self.update()
 
     # -Widget Methods-
@@ -211,6 +220,9 @@ class MainWindow(tk.Tk):
         # -Radiobuttons-
         ttk.Style().configure('Interaction.TRadiobutton',
                               background=self.SEC_BG_COLOR)
+        # -Checkbuttons-
+        ttk.Style().configure('Path.TCheckbutton',
+                              background='#FFFFFF')
 
         # -Optionmenu-
         ttk.Style().configure(self.plot_options.winfo_class(),
@@ -409,9 +421,15 @@ class MainWindow(tk.Tk):
         self.upload_chr_path_Label = ctk.Label(self.upload_chr_Frame,
                                                textvariable=self.chrFilePath_var,
                                                style='Path.TLabel', font=9)
+        self.upload_chr_headless_Checkbutton = ctk.Checkbutton(self.upload_chr_Frame,
+                                                               text='Headless Browser', font=9,
+                                                               variable=self.headless_var,
+                                                               style='Path.TCheckbutton')
         # -Place Widgets-
         self.upload_chr_upload_Button.place(**self.UPLOAD_BUTTON)
-        self.upload_chr_path_Label.place(**self.UPLOAD_LABEL)
+        self.upload_chr_path_Label.place(**{**self.UPLOAD_LABEL, 'relheight': 0.4})
+        self.upload_chr_headless_Checkbutton.place(x=10, y=0, width=-20, height=-10,
+                                                   relx=0, rely=0.75, relwidth=1, relheight=0.25)
 
     def fill_protein_Frame(self):
         """Fill Frame with neccessary widgets"""
@@ -510,6 +528,14 @@ class MainWindow(tk.Tk):
                 return
             self.chrFilePath_var.set(path)
 
+    def close(self):
+        """
+        Quit the pooled browser and close the window
+        """
+        if self.driver_pool is not None:
+            self.driver_pool.close()
+        self.destroy()
+
     def update_wraplengths(self, event):
         """
         Update the wraplengths for the path displayers
@@ -622,6 +648,7 @@ class MainWindow(tk.Tk):
         pdb_file_path = self.pdbFilePath_var.get()
         csv_file_path = self.csvFilePath_var.get()
         driver_path = self.chrFilePath_var.get()
+        headless = self.headless_var.get()
 
         # -Check for invalid paths-
         if not os.path.isfile(pdb_file_path):
@@ -643,12 +670,22 @@ class MainWindow(tk.Tk):
             return
 
         # -Run algroithm-
+        if self.driver_pool is None or self.driver_pool.chrome_driver_path != driver_path \
+                or self.driver_pool.headless != headless:
+            if self.driver_pool is not None:
+                self.driver_pool.close()
+            self.driver_pool = PISA_Driver_Pool(chrome_driver_path=driver_path,
+                                                size=1, headless=headless)
         pisa = PISA_Protein(protein_name=protein_name,
                             pdb_file_path=pdb_file_path,
                             mapping_file_path=csv_file_path,
                             chrome_driver_path=driver_path,
                             wanted_protein_letter=wanted_id,
-                            edge_list=edge_list)
+                            edge_list=edge_list,
+                            cache=self.pisa_cache,
+                            driver_pool=self.driver_pool,
+                            headless=headless,
+                            resume=True)
         if interaction == 'main':
             pisa.scrape_chain_interaction()
             pisa.make_chain_edge_list()
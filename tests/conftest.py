@@ -0,0 +1,62 @@
+import os
+import sys
+import pytest
+
+# the scripts are run from their own folder; the windows and mac copies are the same code
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'LouiseNet_win_scripts'))
+
+from LouiseNet_browser import PISA_Driver_Pool
+from LouiseNet_pisa_server import PISA_Stand_In_Server, write_fixture_pages
+
+# chains of the synthetic pisa job; every pair of them shares an interface
+PISA_CHAIN_IDS = 'ABCDE'
+
+
+# the pages of a synthetic pisa job in the PISA_Replay layout
+@pytest.fixture
+def fixture_pages(tmp_path):
+    fixture_dir = tmp_path / 'pages'
+    write_fixture_pages(str(fixture_dir), chain_ids=PISA_CHAIN_IDS)
+    return (fixture_dir)
+
+
+# the pisa stand-in serving fixture_pages for every upload, on a free port
+@pytest.fixture
+def pisa_server(fixture_pages):
+    with PISA_Stand_In_Server(str(fixture_pages)) as server:
+        yield (server)
+
+
+# a browser session that only keeps the page it is on and its cookies, and counts how often it was quit
+class Stub_Driver:
+    def __init__(self, url):
+        self.current_url = url
+        self.cookies = []
+        self.quit_count = 0
+
+    def get(self, url):
+        self.current_url = url
+
+    def get_cookies(self):
+        return (list(self.cookies))
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def delete_all_cookies(self):
+        self.cookies = []
+
+    def quit(self):
+        self.quit_count += 1
+
+
+# PISA_Driver_Pool over stub sessions; started holds every session it started
+class Stub_Driver_Pool(PISA_Driver_Pool):
+    def __init__(self, size=2):
+        super().__init__(None, size=size)
+        self.started = []
+
+    def new_driver(self):
+        driver = Stub_Driver(self.url)
+        self.started.append(driver)
+        return (driver)
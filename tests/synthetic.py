@@ -0,0 +1,85 @@
+import numpy as np
+import struct
+from LouiseNet_structure import ATOM_DTYPE
+
+RESIDUE_NAMES = [b'ALA', b'ARG', b'ASP', b'GLU', b'LYS', b'SER', b'CYS', b'LEU']
+ATOM_NAMES = [b'N', b'CA', b'C', b'O', b'CB', b'CG', b'OD1', b'NZ']
+ELEMENTS = [b'N', b'C', b'C', b'O', b'C', b'C', b'O', b'N']
+PDB_ATOM_LINE = 'ATOM  {:5d} {:<4s} {:>3s} {:1s}{:4d}{:1s}   {:8.3f}{:8.3f}{:8.3f}{:6.2f}{:6.2f}          {:>2s}\n'
+MMCIF_COLUMNS = ['group_PDB', 'id', 'type_symbol', 'label_atom_id', 'label_alt_id', 'label_comp_id', 'label_asym_id',
+                 'label_seq_id', 'pdbx_PDB_ins_code', 'Cartn_x', 'Cartn_y', 'Cartn_z', 'occupancy', 'B_iso_or_equiv',
+                 'auth_seq_id', 'auth_asym_id', 'pdbx_PDB_model_num']
+MMCIF_ATOM_LINE = 'ATOM {} {} "{}" . {} {} {} {} {:.3f} {:.3f} {:.3f} 1.00 0.00 {} {} {}\n'
+
+
+# globular chains of compact eight atom residues, their centres on a grid close enough for neighbours to touch
+def packed_chains(chain_ids='ABCDEF', residues=40, packing=0.85, seed=0):
+    rng = np.random.default_rng(seed)
+    radius = (residues * 135 * 3 / (4 * np.pi)) ** (1 / 3)
+    side = int(np.ceil(len(chain_ids) ** (1 / 3)))
+    chains = []
+    for k, chain in enumerate(chain_ids):
+        centre = np.array([k % side, k // side % side, k // side // side]) * 2 * radius * packing
+        directions = rng.normal(size=(residues, 3))
+        directions /= np.linalg.norm(directions, axis=1)[:, None]
+        residue_centres = centre + directions * radius * rng.uniform(0, 1, (residues, 1)) ** (1 / 3)
+        atoms = np.zeros(residues * 8, dtype=ATOM_DTYPE)
+        atoms['chain'] = chain
+        atoms['residue_number'] = np.repeat(np.arange(1, residues + 1), 8)
+        atoms['residue_name'] = np.array(RESIDUE_NAMES)[rng.integers(0, len(RESIDUE_NAMES), residues)].repeat(8)
+        atoms['atom_name'] = np.tile(ATOM_NAMES, residues)
+        atoms['element'] = np.tile(ELEMENTS, residues)
+        atoms['coordinates'] = np.repeat(residue_centres, 8, axis=0) + rng.normal(scale=1.3, size=(residues * 8, 3))
+        chains.append(atoms)
+    return (np.concatenate(chains))
+
+
+# a pdb file of the given models; with more than one each goes in its own MODEL record
+def write_pdb(file_path, *models):
+    with open(file_path, 'w') as f:
+        for number, atoms in enumerate(models):
+            if len(models) > 1:
+                f.write('MODEL     {:4d}\n'.format(number + 1))
+            for k, atom in enumerate(atoms):
+                f.write(PDB_ATOM_LINE.format(
+                    k + 1, atom['atom_name'].decode(), atom['residue_name'].decode(), atom['chain'].decode(),
+                    atom['residue_number'], atom['insertion_code'].decode(), *atom['coordinates'], 1.0, 0.0,
+                    atom['element'].decode()))
+            if len(models) > 1:
+                f.write('ENDMDL\n')
+        f.write('END\n')
+
+
+# an mmcif file of the given models in one _atom_site loop, told apart by pdbx_PDB_model_num; the label chain ids
+# differ from the author ones, which are the ones read
+def write_mmcif(file_path, *models):
+    with open(file_path, 'w') as f:
+        f.write('data_synthetic\n#\nloop_\n')
+        f.write(''.join('_atom_site.' + column + '\n' for column in MMCIF_COLUMNS))
+        for number, atoms in enumerate(models):
+            for k, atom in enumerate(atoms):
+                f.write(MMCIF_ATOM_LINE.format(
+                    k + 1, atom['element'].decode(), atom['atom_name'].decode(), atom['residue_name'].decode(),
+                    'X' + atom['chain'].decode(), atom['residue_number'], atom['insertion_code'].decode() or '?',
+                    *atom['coordinates'], atom['residue_number'], atom['chain'].decode(), number + 1))
+        f.write('#\n')
+
+
+def write_mapping(file_path, chain_ids):
+    with open(file_path, 'w') as f:
+        f.write(''.join('protein_{},{}\n'.format(chain, chain) for chain in chain_ids))
+
+
+# a charmm/namd dcd trajectory of the given coordinate frames, without unit cells
+def write_dcd(file_path, frames):
+    def record(data):
+        return (struct.pack('<i', len(data)) + data + struct.pack('<i', len(data)))
+
+    control = [len(frames), 0, 1, 0, 0, 0, 0, 0, 0, 0, 0] + [0] * 8 + [24]
+    with open(file_path, 'wb') as f:
+        f.write(record(b'CORD' + struct.pack('<20i', *control)))
+        f.write(record(struct.pack('<i', 1) + b'synthetic'.ljust(80)))
+        f.write(record(struct.pack('<i', len(frames[0]))))
+        for coordinates in frames:
+            for axis in range(3):
+                f.write(record(np.ascontiguousarray(coordinates[:, axis], dtype='<f4').tobytes()))
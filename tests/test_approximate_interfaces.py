@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+from LouiseNet_backend import PISA_Protein
+from LouiseNet_interface import chain_interfaces, approximate_chain_interfaces
+from synthetic import packed_chains, write_pdb, write_mapping
+
+CHAIN_IDS = 'ABCDEFGHIJKLMNOPQR'
+
+
+def chain_edges(tmp_path, name, approximate, min_area):
+    protein = PISA_Protein(str(tmp_path / name), str(tmp_path / 'structure.pdb'), str(tmp_path / 'mapping.csv'),
+                           None, 'A', 'letter')
+    protein.compute_chain_interaction(n_points=60, approximate=approximate, min_area=min_area)
+    protein.make_chain_edge_list()
+    edges = pd.read_csv(str(tmp_path / name) + '_edgelist_chainID.csv', header=None)
+    return (set(zip(edges[0], edges[1])))
+
+
+def test_approximate_edgelists_match_accurate(tmp_path):
+    atoms = packed_chains(CHAIN_IDS, residues=40)
+    write_pdb(tmp_path / 'structure.pdb', atoms)
+    write_mapping(tmp_path / 'mapping.csv', CHAIN_IDS)
+    areas = chain_interfaces(atoms, 60)['interface_area']
+    assert len(areas) > 8
+    estimated = 0
+    for min_area in [0.0] + list(np.quantile(areas, [0.25, 0.5, 0.75])):
+        accurate = chain_edges(tmp_path, 'accurate', False, min_area)
+        assert chain_edges(tmp_path, 'approximate', True, min_area) == accurate
+        errors = pd.read_csv(str(tmp_path / 'approximate') + '_interface_errors.csv')
+        estimated += (errors['Estimated Error'] > 0).sum()
+    # some edges were decided on residue level estimates alone, so the error bounds were put to the test
+    assert estimated > 0
+
+
+def test_approximate_errors_cover_atom_level_areas():
+    atoms = packed_chains(CHAIN_IDS, residues=40, seed=1)
+    accurate = chain_interfaces(atoms, 100)
+    approximate = approximate_chain_interfaces(atoms, min_area=1e9)
+    both = accurate.merge(approximate, on=['chain_1', 'chain_2'], suffixes=('', '_approximate'))
+    assert len(both) > 0
+    assert ((both['interface_area'] - both['interface_area_approximate']).abs()
+            <= both['interface_area_error'] + 1e-6).all()
@@ -0,0 +1,117 @@
+import threading
+import time
+from LouiseNet_async import PISA_Async_Runner
+from LouiseNet_backend import PISA_Protein
+from LouiseNet_cache import PISA_Cache
+from LouiseNet_http import PISA_HTTP_Client, PISA_Rate_Limiter
+from conftest import PISA_CHAIN_IDS
+from synthetic import write_mapping
+
+
+# the pisa requests of a run, the jobs started and the most jobs that were running at once
+class Job_Log:
+    def __init__(self, monkeypatch):
+        self.lock = threading.Lock()
+        self.request_times = []
+        self.jobs = []
+        self.details = []
+        self.running = 0
+        self.most_running = 0
+        wait = PISA_Rate_Limiter.wait
+        start_job = PISA_HTTP_Client.start_job
+        details_page = PISA_HTTP_Client.details_page
+        log = self
+
+        # when each request was let through
+        def logged_wait(rate_limiter):
+            wait(rate_limiter)
+            with log.lock:
+                log.request_times.append(time.monotonic())
+
+        def logged_start_job(client):
+            with log.lock:
+                log.jobs.append(client.pdb_file_path)
+                log.running += 1
+                log.most_running = max(log.most_running, log.running)
+            try:
+                # long enough for the other job slots to fill up
+                time.sleep(0.1)
+                return (start_job(client))
+            finally:
+                with log.lock:
+                    log.running -= 1
+
+        def logged_details_page(client, interface_id):
+            with log.lock:
+                log.details.append((client.pdb_file_path, int(interface_id)))
+            return (details_page(client, interface_id))
+
+        monkeypatch.setattr(PISA_Rate_Limiter, 'wait', logged_wait)
+        monkeypatch.setattr(PISA_HTTP_Client, 'start_job', logged_start_job)
+        monkeypatch.setattr(PISA_HTTP_Client, 'details_page', logged_details_page)
+
+
+# structures with different bytes, so each has cache entries of its own; the stand-in serves them the same pages
+def structures(tmp_path, pisa_server, cache, count):
+    write_mapping(tmp_path / 'mapping.csv', PISA_CHAIN_IDS)
+    proteins = []
+    for k in range(count):
+        (tmp_path / 'structure_{}.pdb'.format(k)).write_text('ATOM {}\n'.format(k))
+        proteins.append(PISA_Protein(str(tmp_path / 'protein_{}'.format(k)),
+                                     str(tmp_path / 'structure_{}.pdb'.format(k)), str(tmp_path / 'mapping.csv'),
+                                     None, 'A', 'letter', cache=cache, pisa_url=pisa_server.url, detail_workers=2))
+    return (proteins)
+
+
+def edgelist(tmp_path, k):
+    return ((tmp_path / 'protein_{}_edgelist_chainID_with_detail.csv'.format(k)).read_text())
+
+
+def test_structures_share_the_job_slots_and_rate(pisa_server, tmp_path, monkeypatch):
+    cache = PISA_Cache(str(tmp_path / 'cache'))
+    proteins = structures(tmp_path, pisa_server, cache, 5)
+    log = Job_Log(monkeypatch)
+    with PISA_Async_Runner(requests_per_second=50, max_jobs=2, poll_interval=0.01) as runner:
+        results = runner.run(proteins)
+    assert not any(isinstance(result, Exception) for result in results)
+    assert sorted(log.jobs) == sorted(protein.pdb_file_path for protein in proteins)
+    assert log.most_running == 2
+    # every request waited for its slot of the shared rate limiter, one every 1 / 50 s
+    assert max(log.request_times) - min(log.request_times) >= (len(log.request_times) - 1) / 50 - 0.001
+    # chain A is in four interfaces of every structure
+    assert len(log.details) == 5 * 4
+    for k in range(5):
+        assert edgelist(tmp_path, k) == edgelist(tmp_path, 0) != ''
+
+
+def test_cached_structures_need_no_job(pisa_server, tmp_path, monkeypatch):
+    cache = PISA_Cache(str(tmp_path / 'cache'))
+    with PISA_Async_Runner(requests_per_second=50, max_jobs=2, poll_interval=0.01) as runner:
+        runner.run(structures(tmp_path, pisa_server, cache, 3))
+        expected = [edgelist(tmp_path, k) for k in range(3)]
+        log = Job_Log(monkeypatch)
+        results = runner.run(structures(tmp_path, pisa_server, cache, 3))
+    assert not any(isinstance(result, Exception) for result in results)
+    assert log.request_times == [] and log.jobs == []
+    assert [edgelist(tmp_path, k) for k in range(3)] == expected
+
+
+def test_missing_residue_tables_are_fetched_after_an_async_job(pisa_server, tmp_path, monkeypatch):
+    cache = PISA_Cache(str(tmp_path / 'cache'))
+    with PISA_Async_Runner(requests_per_second=50, max_jobs=2, poll_interval=0.01) as runner:
+        proteins = structures(tmp_path, pisa_server, cache, 2)
+        runner.run(proteins)
+        expected = edgelist(tmp_path, 0)
+        cache.remove(cache.entry_path(proteins[0].pisa_result_key(), 'details_1'))
+        log = Job_Log(monkeypatch)
+
+        # the job has to be submitted and polled by the runner, not from inside the stage's thread
+        def blocking_submit(client):
+            raise AssertionError('the stage submitted the structure itself')
+
+        monkeypatch.setattr(PISA_HTTP_Client, 'submit_structure', blocking_submit)
+        results = runner.run(structures(tmp_path, pisa_server, cache, 2))
+    assert not any(isinstance(result, Exception) for result in results)
+    assert log.jobs == [proteins[0].pdb_file_path]
+    assert log.details == [(proteins[0].pdb_file_path, 1)]
+    assert edgelist(tmp_path, 0) == expected
@@ -0,0 +1,30 @@
+import os
+from LouiseNet_cache import PISA_Cache, Interface_Cache
+
+
+def test_eviction_keeps_entry_cap_without_listing_every_put(tmp_path, monkeypatch):
+    cache = PISA_Cache(str(tmp_path), max_entries=100)
+    listings = []
+    listdir = os.listdir
+    monkeypatch.setattr(os, 'listdir', lambda path: listings.append(path) or listdir(path))
+    for i in range(1000):
+        cache.put('structure', str(i), [i])
+    monkeypatch.undo()
+    assert cache.stats()['entries'] <= 100
+    assert cache.total_bytes == cache.stats()['bytes']
+    # one listing on the first put, then one per eviction, each freeing a tenth of the cap
+    assert len(listings) < 100
+    # the oldest entries go first
+    assert cache.get('structure', '999') == [999]
+    assert cache.get('structure', '0') is None
+
+
+def test_eviction_keeps_byte_cap(tmp_path):
+    cache = PISA_Cache(str(tmp_path), max_bytes=2000)
+    for i in range(200):
+        cache.put('structure', str(i), [i] * 10)
+    assert 0 < cache.stats()['bytes'] <= 2000
+
+
+def test_interface_cache_caps_entries(tmp_path):
+    assert Interface_Cache(str(tmp_path)).max_entries is not None
@@ -0,0 +1,85 @@
+import json
+import pytest
+from LouiseNet_backend import PISA_Protein
+from LouiseNet_cache import PISA_Checkpoint
+from LouiseNet_http import PISA_HTTP_Client
+from LouiseNet_replay import PISA_Replay
+from LouiseNet_tables import extract_detail_rows
+from conftest import PISA_CHAIN_IDS
+from synthetic import write_mapping
+
+
+def checkpoint_lines(file_path):
+    with open(file_path, encoding='utf-8') as f:
+        return ([json.loads(line) for line in f])
+
+
+def test_a_torn_last_line_is_dropped(tmp_path):
+    file_path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = PISA_Checkpoint(file_path, 'hash')
+    checkpoint.add(0, [[['1', 'A:ARG 4']], [['1', 'B:GLU 9']]])
+    checkpoint.add(1, [[], []])
+    checkpoint.close()
+    # a crash in the middle of writing the third entry
+    with open(file_path, 'a', encoding='utf-8') as f:
+        f.write('{"interface_id": 2, "deta')
+    checkpoint = PISA_Checkpoint(file_path, 'hash', resume=True)
+    assert checkpoint.details == {0: [[['1', 'A:ARG 4']], [['1', 'B:GLU 9']]], 1: [[], []]}
+    checkpoint.add(2, [[], []])
+    checkpoint.close()
+    # the torn line is gone from the file, so the new entry reads back
+    assert [line.get('interface_id') for line in checkpoint_lines(file_path)] == [None, 0, 1, 2]
+    assert PISA_Checkpoint(file_path, 'hash', resume=True).details.keys() == {0, 1, 2}
+
+
+def test_entries_of_another_structure_or_run_are_discarded(tmp_path):
+    file_path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = PISA_Checkpoint(file_path, 'old hash')
+    checkpoint.add(0, [[], []])
+    checkpoint.close()
+    checkpoint = PISA_Checkpoint(file_path, 'new hash', resume=True)
+    checkpoint.close()
+    assert checkpoint.details == {}
+    assert checkpoint_lines(file_path) == [{'structure_hash': 'new hash'}]
+    checkpoint = PISA_Checkpoint(file_path, 'new hash')
+    checkpoint.add(0, [[], []])
+    checkpoint.close()
+    # without resume a run starts over
+    assert PISA_Checkpoint(file_path, 'new hash').details == {}
+
+
+def test_a_resumed_run_only_fetches_what_is_left(pisa_server, fixture_pages, tmp_path, monkeypatch):
+    (tmp_path / 'structure.pdb').write_text('ATOM\n')
+    write_mapping(tmp_path / 'mapping.csv', PISA_CHAIN_IDS)
+    fetched = []
+    details_page = PISA_HTTP_Client.details_page
+
+    def failing_details_page(client, interface_id):
+        if len(fetched) == 3:
+            raise ConnectionError('lost the connection to pisa')
+        fetched.append(interface_id)
+        return (details_page(client, interface_id))
+
+    monkeypatch.setattr(PISA_HTTP_Client, 'details_page', failing_details_page)
+
+    def scrape(interface_ids):
+        with PISA_HTTP_Client(str(tmp_path / 'structure.pdb'), pisa_url=pisa_server.url,
+                              poll_interval=0.01) as client:
+            protein = PISA_Protein(str(tmp_path / 'protein'), str(tmp_path / 'structure.pdb'),
+                                   str(tmp_path / 'mapping.csv'), None, 'A', 'letter', page_source=client,
+                                   pisa_url=pisa_server.url, resume=True)
+            return (protein.scrape_interface_details(interface_ids))
+
+    interface_ids = list(range(6))
+    with pytest.raises(ConnectionError):
+        scrape(interface_ids)
+    assert fetched == [0, 1, 2]
+    assert len(checkpoint_lines(tmp_path / 'protein_checkpoint.jsonl')) == 1 + 3
+    fetched.clear()
+    details = scrape(interface_ids)
+    assert fetched == [3, 4, 5]
+    replay = PISA_Replay(str(fixture_pages))
+    assert {i: [list(side) for side in sides] for i, sides in details.items()} == \
+        {i: [list(side) for side in extract_detail_rows(replay.details_page(i))] for i in interface_ids}
+    # a finished run leaves no checkpoint behind
+    assert not (tmp_path / 'protein_checkpoint.jsonl').exists()
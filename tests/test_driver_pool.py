@@ -0,0 +1,116 @@
+import queue
+import threading
+import pytest
+from selenium.common.exceptions import WebDriverException
+import LouiseNet_browser
+from conftest import Stub_Driver_Pool
+
+
+def assert_quit_once(pool):
+    assert [driver.quit_count for driver in pool.started] == [1] * len(pool.started)
+
+
+def test_sessions_are_started_up_to_size_and_reused():
+    pool = Stub_Driver_Pool(size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second and len(pool.started) == 2
+    # a full pool hands out no third session
+    assert not pool.reserve()
+    with pytest.raises(queue.Empty):
+        pool.acquire(timeout=0)
+    first.add_cookie({'name': 'pisa_session', 'value': '1'})
+    first.get(pool.url + 'interfaces')
+    pool.release(first)
+    # a released session is reset to the landing page and handed out again
+    assert pool.acquire(timeout=0) is first
+    assert first.cookies == [] and first.current_url == pool.url
+    pool.release(first)
+    pool.release(second)
+    pool.close()
+    assert_quit_once(pool)
+
+
+def test_warm_up_starts_every_session():
+    pool = Stub_Driver_Pool(size=3)
+    pool.warm_up()
+    assert len(pool.started) == 3 and pool.idle_drivers.qsize() == 3
+    assert {pool.acquire(timeout=0) for _ in range(3)} == set(pool.started)
+    pool.close()
+    assert_quit_once(pool)
+
+
+def test_a_discarded_session_frees_its_slot():
+    pool = Stub_Driver_Pool(size=1)
+    crashed = pool.acquire()
+
+    def crash(url):
+        raise WebDriverException('chrome not reachable')
+
+    crashed.get = crash
+    # a session that can't be reset is quit instead of going back to the pool
+    pool.release(crashed)
+    assert crashed.quit_count == 1
+    replacement = pool.acquire(timeout=0)
+    assert replacement is not crashed and len(pool.started) == 2
+    pool.discard(replacement)
+    assert pool.acquire(timeout=0) is pool.started[2]
+    pool.close()
+    assert_quit_once(pool)
+
+
+def test_a_failed_start_frees_its_slot(monkeypatch):
+    pool = Stub_Driver_Pool(size=1)
+    new_driver = pool.new_driver
+
+    def failing_new_driver():
+        raise WebDriverException('session not created')
+
+    monkeypatch.setattr(pool, 'new_driver', failing_new_driver)
+    with pytest.raises(WebDriverException):
+        pool.acquire(timeout=0)
+    monkeypatch.setattr(pool, 'new_driver', new_driver)
+    assert pool.acquire(timeout=0) is pool.started[0]
+    pool.close()
+    assert_quit_once(pool)
+
+
+def test_a_waiting_acquire_gets_a_released_session():
+    pool = Stub_Driver_Pool(size=1)
+    driver = pool.acquire()
+    acquired = []
+    waiting = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    waiting.start()
+    pool.release(driver)
+    waiting.join(5)
+    assert acquired == [driver]
+    pool.close()
+    assert_quit_once(pool)
+
+
+def test_sessions_are_quit_once_when_the_interpreter_exits(monkeypatch):
+    exit_hooks = []
+    monkeypatch.setattr(LouiseNet_browser.atexit, 'register', exit_hooks.append)
+    pool = Stub_Driver_Pool(size=3)
+    in_use = pool.acquire()
+    idle = pool.acquire()
+    pool.release(idle)
+    assert exit_hooks == [pool.close]
+    for hook in exit_hooks:
+        hook()
+    assert_quit_once(pool)
+    # sessions handed back or started after the pool closed are quit, but never twice
+    pool.release(in_use)
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=0)
+    pool.close()
+    assert_quit_once(pool)
+
+
+def test_a_session_started_while_closing_is_quit():
+    pool = Stub_Driver_Pool(size=1)
+    assert pool.reserve()
+    pool.close()
+    with pytest.raises(RuntimeError):
+        pool.start_reserved()
+    assert_quit_once(pool)
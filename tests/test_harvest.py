@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+from LouiseNet_backend import PISA_Protein
+from conftest import Stub_Driver_Pool, PISA_CHAIN_IDS
+from synthetic import write_mapping
+
+
+# a protein whose structure was submitted on a session of pool; its residue tables name the interface and the
+# session that fetched them, after a random wait so the sessions finish out of order
+def submitted_protein(tmp_path, name, pool, workers, monkeypatch, fetched_by):
+    (tmp_path / 'structure.pdb').write_text('ATOM\n')
+    write_mapping(tmp_path / 'mapping.csv', PISA_CHAIN_IDS)
+    rng = random.Random(name)
+    lock = threading.Lock()
+
+    def scrape_interface_detail(protein, driver, interface_id):
+        with lock:
+            wait = rng.uniform(0, 0.02)
+        time.sleep(wait)
+        fetched_by[interface_id] = driver
+        return ([['1', 'interface {}'.format(interface_id)]], [['1', driver.current_url]])
+
+    monkeypatch.setattr(PISA_Protein, 'scrape_interface_detail', scrape_interface_detail)
+    protein = PISA_Protein(str(tmp_path / name), str(tmp_path / 'structure.pdb'), str(tmp_path / 'mapping.csv'),
+                           None, 'A', 'letter', driver_pool=pool, detail_workers=workers)
+    protein.driver = pool.acquire()
+    protein.driver.get(pool.url + 'interfaces')
+    protein.driver.add_cookie({'name': 'pisa_session', 'value': name})
+    return (protein)
+
+
+def test_details_come_back_in_interface_order(tmp_path, monkeypatch):
+    pool = Stub_Driver_Pool(size=3)
+    fetched_by = {}
+    protein = submitted_protein(tmp_path, 'protein', pool, 3, monkeypatch, fetched_by)
+    interface_ids = list(range(30))
+    details = protein.scrape_interface_details(interface_ids)
+    assert list(details) == interface_ids
+    for i in interface_ids:
+        # every extra session joined the job on its interfaces page
+        assert details[i] == ([['1', 'interface {}'.format(i)]], [['1', pool.url + 'interfaces']])
+    assert len(set(fetched_by.values())) == 3
+    # the extra sessions went back to the pool, reset
+    assert pool.idle_drivers.qsize() == 2
+    assert all(driver.cookies == [] for driver in pool.started if driver is not protein.driver)
+    pool.close()
+
+
+def test_extra_sessions_are_only_taken_when_spare(tmp_path, monkeypatch):
+    pool = Stub_Driver_Pool(size=1)
+    fetched_by = {}
+    protein = submitted_protein(tmp_path, 'protein', pool, 3, monkeypatch, fetched_by)
+    fetched = []
+    start = time.monotonic()
+    thread = threading.Thread(target=lambda: fetched.extend(protein.harvest_interface_details(list(range(10)), 3)),
+                              daemon=True)
+    thread.start()
+    thread.join(5)
+    # the pool was exhausted, so the run went on with its own session instead of waiting for another
+    assert not thread.is_alive()
+    assert time.monotonic() - start < 0.5
+    assert sorted(i for i, details in fetched) == list(range(10))
+    assert set(fetched_by.values()) == {protein.driver}
+    assert len(pool.started) == 1
+    pool.close()
+
+
+def test_runs_holding_every_session_do_not_wait_on_each_other(tmp_path, monkeypatch):
+    pool = Stub_Driver_Pool(size=2)
+    fetched_by = {}
+    proteins = [submitted_protein(tmp_path, 'protein_{}'.format(k), pool, 2, monkeypatch, fetched_by)
+                for k in range(2)]
+    results = {}
+    both_started = threading.Barrier(2)
+
+    def harvest(k):
+        both_started.wait()
+        results[k] = sorted(i for i, details in proteins[k].harvest_interface_details(list(range(10)), 2))
+
+    threads = [threading.Thread(target=harvest, args=(k,), daemon=True) for k in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert results == {0: list(range(10)), 1: list(range(10))}
+    pool.close()
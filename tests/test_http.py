@@ -0,0 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+from LouiseNet_http import PISA_HTTP_Client, PISA_Rate_Limiter
+from LouiseNet_replay import PISA_Replay
+from LouiseNet_tables import extract_interfaces_rows, extract_detail_rows, rows_to_frame
+
+
+def test_client_pages_match_the_replay(pisa_server, fixture_pages, tmp_path):
+    (tmp_path / 'structure.pdb').write_text('ATOM\n')
+    replay = PISA_Replay(str(fixture_pages))
+    expected = extract_interfaces_rows(replay.interfaces_page())
+    with PISA_HTTP_Client(str(tmp_path / 'structure.pdb'), pisa_url=pisa_server.url, poll_interval=0.01,
+                          rate_limiter=PISA_Rate_Limiter(100)) as client:
+        assert rows_to_frame(extract_interfaces_rows(client.interfaces_page())).equals(rows_to_frame(expected))
+        interface_ids = range(len(expected))
+        # details pages are fetched from several threads over the one session
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            pages = list(executor.map(client.details_page, interface_ids))
+    for interface_id, page in zip(interface_ids, pages):
+        left, right = extract_detail_rows(page)
+        expected_left, expected_right = extract_detail_rows(replay.details_page(interface_id))
+        assert rows_to_frame(left).equals(rows_to_frame(expected_left))
+        assert rows_to_frame(right).equals(rows_to_frame(expected_right))
+
@@ -0,0 +1,112 @@
+import os
+import numpy as np
+import pandas as pd
+import LouiseNet_interface
+from LouiseNet_interface import chain_interfaces, chain_contacts, residue_contacts, atom_radii, sphere_points, \
+    PROBE_RADIUS
+from LouiseNet_structure import ATOM_DTYPE
+from synthetic import packed_chains
+
+
+# shrake-rupley by testing every surface point against every atom: the sasa of each atom in its own chain and
+# the area of it each other chain buries
+def brute_force_surfaces(atoms, n_points):
+    coordinates = atoms['coordinates'].astype(np.float64)
+    radii = atom_radii(atoms) + PROBE_RADIUS
+    points = coordinates[:, None, :] + radii[:, None, None] * sphere_points(n_points)
+    inside = np.sum((points[:, :, None, :] - coordinates) ** 2, axis=3) < radii ** 2
+    inside[np.arange(len(atoms)), :, np.arange(len(atoms))] = False
+    chains = np.unique(atoms['chain'])
+    covered = {chain: inside[:, :, atoms['chain'] == chain].any(axis=2) for chain in chains}
+    own = np.array([covered[chain][k] for k, chain in enumerate(atoms['chain'])])
+    point_area = 4 * np.pi * radii ** 2 / n_points
+    sasa = point_area * (~own).sum(axis=1)
+    buried = {chain: point_area * (~own & covered[chain]).sum(axis=1) for chain in chains}
+    return (sasa, buried)
+
+
+def test_surfaces_match_brute_force():
+    atoms = packed_chains('ABC', residues=4)
+    sasa, buried = brute_force_surfaces(atoms, 100)
+    interfaces = chain_interfaces(atoms, 100)
+    for chain, surface in interfaces.attrs['chain_surfaces'].items():
+        assert np.isclose(surface, sasa[atoms['chain'] == chain.encode()].sum())
+    expected = {}
+    for chain_1, chain_2 in [('A', 'B'), ('A', 'C'), ('B', 'C')]:
+        side_1 = buried[chain_2.encode()][atoms['chain'] == chain_1.encode()]
+        side_2 = buried[chain_1.encode()][atoms['chain'] == chain_2.encode()]
+        if side_1.sum() + side_2.sum() > 0:
+            expected[chain_1, chain_2] = ((side_1.sum() + side_2.sum()) / 2, (side_1 > 0).sum(), (side_2 > 0).sum())
+    assert len(expected) > 0
+    found = {(row.chain_1, row.chain_2): (row.interface_area, row.atoms_1, row.atoms_2)
+             for row in interfaces.itertuples()}
+    assert found.keys() == expected.keys()
+    for pair, (area, atoms_1, atoms_2) in expected.items():
+        assert np.isclose(found[pair][0], area)
+        assert found[pair][1:] == (atoms_1, atoms_2)
+
+
+def test_two_atom_interface_is_a_spherical_cap():
+    atoms = np.zeros(2, dtype=ATOM_DTYPE)
+    atoms['chain'] = [b'A', b'B']
+    atoms['residue_number'] = 1
+    atoms['element'] = b'C'
+    atoms['coordinates'] = [(0, 0, 0), (4, 0, 0)]
+    interfaces = chain_interfaces(atoms, 2000)
+    radius = 1.7 + PROBE_RADIUS
+    cap_height = radius - 4 / 2
+    assert np.isclose(interfaces['interface_area'][0], 2 * np.pi * radius * cap_height, rtol=0.01)
+    assert np.isclose(interfaces.attrs['chain_surfaces']['A'], 4 * np.pi * radius ** 2)
+
+
+# two groups of chains far apart, so the bounding volumes rule out every pair across them
+def spread_chains():
+    near = packed_chains('ABCD', residues=10)
+    far = packed_chains('EFGH', residues=10, seed=1)
+    far['coordinates'] += np.float32(100)
+    return (np.concatenate([near, far]))
+
+
+def brute_force_pairs(atoms, cutoff):
+    coordinates = atoms['coordinates'].astype(np.float64)
+    i, j = np.nonzero(np.triu(np.sum((coordinates[:, None] - coordinates) ** 2, axis=2) < cutoff ** 2, k=1))
+    return (i, j)
+
+
+def test_chain_contacts_match_brute_force():
+    atoms = spread_chains()
+    i, j = brute_force_pairs(atoms, 4.0)
+    between = atoms['chain'][i] != atoms['chain'][j]
+    expected = pd.DataFrame({'chain_1': atoms['chain'][i][between].astype(str),
+                             'chain_2': atoms['chain'][j][between].astype(str)}).value_counts()
+    contacts = chain_contacts(atoms, 4.0)
+    assert contacts.attrs['pruned_chain_pairs'] >= 16
+    assert dict(zip(zip(contacts['chain_1'], contacts['chain_2']), contacts['contacts'])) == expected.to_dict()
+
+
+def test_pruned_residue_contacts_match_unpruned():
+    atoms = spread_chains()
+    unpruned = residue_contacts(atoms, 4.0)
+    pruned = residue_contacts(atoms, 4.0, between_chains_only=True)
+    assert pruned.attrs['pruned_chain_pairs'] >= 16
+    between = unpruned['residue_1'].str[:1] != unpruned['residue_2'].str[:1]
+    assert len(pruned) > 0
+    assert (pruned.sort_values(['residue_1', 'residue_2']).reset_index(drop=True)
+            .equals(unpruned[between].sort_values(['residue_1', 'residue_2']).reset_index(drop=True)))
+    i, j = brute_force_pairs(atoms, 4.0)
+    same_residue = (atoms['chain'][i] == atoms['chain'][j]) & (atoms['residue_number'][i] == atoms['residue_number'][j])
+    assert unpruned['contacts'].sum() == (~same_residue).sum()
+
+
+def test_pooled_residue_contacts_match_one_process(monkeypatch):
+    atoms = spread_chains()
+    expected = residue_contacts(atoms, 4.0, block_size=256)
+    # the pool is taken however small the structure and however many cores there are
+    monkeypatch.setattr(LouiseNet_interface, 'CONTACT_POOL_BREAK_EVEN_ATOMS', 0)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 2)
+    for between_chains_only in (False, True):
+        pooled = residue_contacts(atoms, 4.0, block_size=256, between_chains_only=between_chains_only, workers=2)
+        one = residue_contacts(atoms, 4.0, block_size=256, between_chains_only=between_chains_only)
+        assert pooled.equals(one)
+    assert pooled.attrs['pruned_chain_pairs'] >= 16
+    assert residue_contacts(atoms, 4.0, block_size=256, workers=2).equals(expected)
@@ -0,0 +1,24 @@
+from LouiseNet_http import PISA_HTTP_Client
+from LouiseNet_pisa_server import PISA_Stand_In_Server, write_fixture_pages
+from LouiseNet_replay import PISA_Replay
+from LouiseNet_tables import extract_interfaces_rows
+
+
+def test_every_upload_gets_the_fixture_pages(pisa_server, fixture_pages, tmp_path):
+    expected = extract_interfaces_rows(PISA_Replay(str(fixture_pages)).interfaces_page())
+    for name in ('first.pdb', 'second.pdb'):
+        (tmp_path / name).write_text('ATOM\n')
+        with PISA_HTTP_Client(str(tmp_path / name), pisa_url=pisa_server.url, poll_interval=0.01) as client:
+            assert extract_interfaces_rows(client.interfaces_page()) == expected
+
+
+def test_each_structure_gets_its_own_pages(tmp_path):
+    write_fixture_pages(str(tmp_path / 'sites' / 'dimer'), chain_ids='AB')
+    write_fixture_pages(str(tmp_path / 'sites' / 'tetramer'), chain_ids='ABCD', seed=1)
+    with PISA_Stand_In_Server(str(tmp_path / 'sites')) as server:
+        for name, interfaces in (('dimer', 1), ('tetramer', 6)):
+            (tmp_path / (name + '.pdb')).write_text('ATOM\n')
+            with PISA_HTTP_Client(str(tmp_path / (name + '.pdb')), pisa_url=server.url, poll_interval=0.01) as client:
+                rows = extract_interfaces_rows(client.interfaces_page())
+            assert rows == extract_interfaces_rows(PISA_Replay(str(tmp_path / 'sites' / name)).interfaces_page())
+            assert len(rows) == interfaces
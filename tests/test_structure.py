@@ -0,0 +1,56 @@
+import gzip
+import shutil
+import numpy as np
+from LouiseNet_structure import read_pdb, read_mmcif, read_structure
+from synthetic import packed_chains, write_pdb, write_mmcif
+
+TEXT_FIELDS = ['chain', 'residue_name', 'residue_number', 'insertion_code', 'atom_name', 'element']
+
+
+def assert_same_atoms(read, written):
+    assert len(read) == len(written)
+    for field in TEXT_FIELDS:
+        assert (read[field] == written[field]).all(), field
+    assert np.allclose(read['coordinates'], written['coordinates'], atol=1e-3)
+
+
+def test_pdb_and_mmcif_parse_the_same_atoms(tmp_path):
+    atoms = packed_chains('ABC', residues=30)
+    atoms['insertion_code'][atoms['residue_number'] % 7 == 0] = b'A'
+    write_pdb(tmp_path / 'structure.pdb', atoms)
+    write_mmcif(tmp_path / 'structure.cif', atoms)
+    # small chunks put chunk boundaries all through the atom lines
+    for chunk_size in (1 << 22, 1000, 97):
+        assert_same_atoms(read_pdb(str(tmp_path / 'structure.pdb'), chunk_size), atoms)
+        assert_same_atoms(read_mmcif(str(tmp_path / 'structure.cif'), chunk_size), atoms)
+
+
+def test_only_the_first_model_is_read(tmp_path):
+    first = packed_chains('AB', residues=10)
+    second = packed_chains('AB', residues=10, seed=1)
+    write_pdb(tmp_path / 'models.pdb', first, second)
+    write_mmcif(tmp_path / 'models.cif', first, second)
+    for name, read in (('models.pdb', read_pdb), ('models.cif', read_mmcif)):
+        assert_same_atoms(read_structure(str(tmp_path / name)), first)
+        # the second model starting in the middle of a chunk
+        assert_same_atoms(read(str(tmp_path / name), 500), first)
+
+
+def test_compressed_files_read_like_plain_ones(tmp_path):
+    atoms = packed_chains('AB', residues=10)
+    write_mmcif(tmp_path / 'structure.cif', atoms)
+    with open(tmp_path / 'structure.cif', 'rb') as f, gzip.open(tmp_path / 'structure.cif.gz', 'wb') as g:
+        shutil.copyfileobj(f, g)
+    assert_same_atoms(read_structure(str(tmp_path / 'structure.cif.gz')), atoms)
+
+
+def test_alternate_locations_keep_the_first(tmp_path):
+    (tmp_path / 'altloc.pdb').write_text(
+        'ATOM      1  N   SER A   1       1.000   2.000   3.000  1.00  0.00           N\n'
+        'ATOM      2  CA ASER A   1       4.000   5.000   6.000  0.50  0.00           C\n'
+        'ATOM      3  CA BSER A   1       7.000   8.000   9.000  0.50  0.00           C\n'
+        'HETATM    4 ZN    ZN B   2      10.000  11.000  12.000  1.00  0.00          ZN\n')
+    atoms = read_structure(str(tmp_path / 'altloc.pdb'))
+    assert list(atoms['atom_name']) == [b'N', b'CA', b'ZN']
+    assert list(atoms['element']) == [b'N', b'C', b'ZN']
+    assert np.allclose(atoms['coordinates'][1], (4, 5, 6))
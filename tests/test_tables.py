@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+from LouiseNet_table_benchmark import loop_clean_interfaces_table, synthetic_interfaces_rows
+from LouiseNet_tables import rows_to_frame, clean_interfaces_table
+
+
+# a pisa-shaped interfaces table of about row_count interfaces with extra_columns more cells per interface row:
+# grouped, interfaces are averaged under 'Average:' rows after a leading group column, and the group members lack
+# the id cell, so their cells start one column early and are moved right when cleaned; ungrouped, every interface
+# has its 18 cells
+def interfaces_frame(row_count, grouped, extra_columns=0):
+    rows = []
+    for row in synthetic_interfaces_rows(row_count):
+        if row[0] == 'Average:':
+            if grouped:
+                rows.append(row)
+            continue
+        extra = [str(k) for k in range(extra_columns)]
+        if grouped:
+            rows.append(row + extra)
+        elif row[0] == '':
+            rows.append([str(len(rows) + 1)] + row[1:] + extra)
+        else:
+            rows.append(row[1:] + extra)
+    return (rows_to_frame(rows))
+
+
+@pytest.mark.parametrize('grouped', [False, True])
+@pytest.mark.parametrize('extra_columns', [0, 4])
+@pytest.mark.parametrize('single_letter_chains', [True, False])
+def test_cleaning_matches_the_row_by_row_loop(grouped, extra_columns, single_letter_chains):
+    frame = interfaces_frame(300, grouped, extra_columns)
+    assert len(frame.columns) == 18 + extra_columns + grouped
+    if grouped:
+        assert (frame[0] == 'Average:').any() and frame[1].isna().any()
+    cleaned = clean_interfaces_table(frame, single_letter_chains)
+    pd.testing.assert_frame_equal(cleaned, loop_clean_interfaces_table(frame.copy(), single_letter_chains))
+    assert len(cleaned.columns) == 18 + extra_columns
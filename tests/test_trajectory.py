@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from LouiseNet_backend import PISA_Protein
+from LouiseNet_interface import chain_contacts, residue_contacts
+from LouiseNet_trajectory import read_frames, pdb_frames, mmcif_frames, trajectory_contacts
+from synthetic import packed_chains, write_pdb, write_mmcif, write_dcd, write_mapping
+
+CHAIN_IDS = 'ABCD'
+
+
+# the same assembly with its atoms moved a little differently in every frame; the chains are spaced so that some
+# of their contacts come and go
+def moving_frames(count=4):
+    atoms = packed_chains(CHAIN_IDS, residues=15, packing=1.1)
+    rng = np.random.default_rng(2)
+    frames = []
+    for frame in range(count):
+        moved = atoms.copy()
+        moved['coordinates'] += rng.normal(scale=1.0, size=moved['coordinates'].shape).astype(np.float32)
+        frames.append(moved)
+    return (frames)
+
+
+def assert_same_frames(read, written):
+    read = list(read)
+    assert len(read) == len(written)
+    for atoms, expected in zip(read, written):
+        assert (atoms['chain'] == expected['chain']).all()
+        assert (atoms['residue_number'] == expected['residue_number']).all()
+        assert np.allclose(atoms['coordinates'], expected['coordinates'], atol=1e-3)
+
+
+def test_every_frame_format_reads_every_frame(tmp_path):
+    frames = moving_frames()
+    write_pdb(tmp_path / 'models.pdb', *frames)
+    write_mmcif(tmp_path / 'models.cif', *frames)
+    # two data blocks of two models each
+    write_mmcif(tmp_path / 'first.cif', *frames[:2])
+    write_mmcif(tmp_path / 'second.cif', *frames[2:])
+    (tmp_path / 'blocks.cif').write_text((tmp_path / 'first.cif').read_text() + (tmp_path / 'second.cif').read_text())
+    write_pdb(tmp_path / 'topology.pdb', frames[0])
+    write_dcd(tmp_path / 'run.dcd', [atoms['coordinates'] for atoms in frames])
+    assert_same_frames(read_frames(str(tmp_path / 'models.pdb')), frames)
+    assert_same_frames(read_frames(str(tmp_path / 'models.cif')), frames)
+    assert_same_frames(read_frames(str(tmp_path / 'blocks.cif')), frames)
+    assert_same_frames(read_frames(str(tmp_path / 'run.dcd'), str(tmp_path / 'topology.pdb')), frames)
+    # small chunks split models, and atom lines, between chunks; with these files chunks of 53 and 54 bytes end
+    # right after a model and split the header of the second data block
+    for chunk_size in (53, 54, 1000):
+        assert_same_frames(pdb_frames(str(tmp_path / 'models.pdb'), chunk_size), frames)
+        assert_same_frames(mmcif_frames(str(tmp_path / 'blocks.cif'), chunk_size), frames)
+
+
+def test_trajectory_contacts_match_each_frame():
+    frames = moving_frames()
+    for level, contacts in (('chain', chain_contacts), ('residue', residue_contacts)):
+        for workers in (1, 2):
+            found = list(trajectory_contacts(iter(frames), level, 4.0, workers))
+            assert len(found) == len(frames)
+            for frame_contacts, atoms in zip(found, frames):
+                assert (frame_contacts.to_numpy() == contacts(atoms, 4.0).to_numpy()).all()
+
+
+def test_persistence_is_the_share_of_frames_with_each_edge(tmp_path):
+    frames = moving_frames()
+    write_pdb(tmp_path / 'topology.pdb', frames[0])
+    write_mapping(tmp_path / 'mapping.csv', CHAIN_IDS)
+    write_dcd(tmp_path / 'run.dcd', [atoms['coordinates'] for atoms in frames])
+    protein = PISA_Protein(str(tmp_path / 'run'), str(tmp_path / 'topology.pdb'), str(tmp_path / 'mapping.csv'),
+                           None, 'A', 'letter')
+    weights = protein.make_trajectory_edgelist(str(tmp_path / 'run.dcd'))
+    edges = pd.concat([chain_contacts(atoms, 4.0) for atoms in frames])
+    expected = edges.groupby(['chain_1', 'chain_2']).size() / len(frames)
+    assert expected.min() < 1
+    found = weights.set_index(['node_1', 'node_2'])['persistence']
+    assert found.to_dict() == expected.to_dict()
+    per_frame = pd.read_csv(str(tmp_path / 'run') + '_edgelist_chainID_frames.csv', header=None)
+    assert sorted(per_frame[0].unique()) == [1, 2, 3, 4]
+    assert len(per_frame) == len(edges)